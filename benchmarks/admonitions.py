@@ -0,0 +1,66 @@
+"""
+Times the admonition converter on pathological inputs and fails if any case goes
+over its budget. The regex it replaced is timed alongside for reference.
+
+    uv run python benchmarks/admonitions.py
+"""
+
+import re
+import sys
+import time
+from sak.blog.transforms import Pipeline
+
+RUNS = 5
+
+legacy_pattern = re.compile(r'[!?]{3} (\w+)(?:\s+"([^"]+)")?\n\n((?:\s{4}.*\n?)+)')
+
+
+def nested(depth: int, lines: int) -> str:
+    post = []
+    for level in range(depth):
+        indent = "    " * level
+        post += [f"{indent}!!! note", ""]
+    indent = "    " * depth
+    post += [f"{indent}line {i} of a deeply nested body" for i in range(lines)]
+    return "\n".join(post)
+
+
+# (name, post, budget in milliseconds)
+CASES = [
+    ("10k indented lines", "!!! note\n\n" + "    body line\n" * 10_000, 100),
+    ("10k indented, no header", "    indented line\n" * 10_000, 100),
+    ("10k blank body lines", "!!! note\n\n    start\n" + "    \n\n" * 5_000 + "end", 100),
+    ("500 admonitions", '!!! tip "Title"\n\n    body\n    more\n\ntext\n\n' * 500, 100),
+    ("500 unclosed headers", "!!! note\n\nnot a body\n" * 500, 100),
+    ("depth 10, 5k lines", nested(10, 5_000), 200),
+]
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main() -> int:
+    pipeline = Pipeline("admonitions")
+    failed = False
+
+    print(f"{'case':28} {'converter':>10} {'old regex':>10} {'budget':>8}")
+    for name, post, budget in CASES:
+        elapsed = best_of(lambda: pipeline.run(post))
+        legacy = best_of(lambda: legacy_pattern.sub("", post))
+
+        ok = elapsed <= budget
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        print(f"{name:28} {elapsed:>8.1f}ms {legacy:>8.1f}ms {budget:>6}ms {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
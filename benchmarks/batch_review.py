@@ -0,0 +1,170 @@
+"""
+Checks `sak blog review --batch` end to end against the local stand-in OpenAI server:
+a full run, skipping posts that already have a result, resuming an interrupted run, and
+the provider batch API from submitting through polling to collecting the results.
+
+    uv run python benchmarks/batch_review.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+POSTS = 6
+
+POST = """---
+draft: false
+authors:
+  - sak
+date:
+  created: 2024-05-01
+categories:
+  - Checks
+tags:
+  - batch
+description: A post reviewed by the batch review check.
+title: Batch Review Post {number}
+---
+
+![main-image](https://example.com/images/{number}.png)
+
+A post about topic {number}.
+
+<!-- more -->
+
+## Part one
+
+Some words about topic {number}.
+"""
+
+
+def result_lines(results: Path) -> list[dict]:
+    # the lines a later run would count as done
+    lines = []
+    for line in results.read_text().splitlines():
+        try:
+            lines.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return lines
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory(prefix="sak-batch-") as tmp:
+        root = Path(tmp)
+        # the caches and ledger live under the home directory, keep them out of the real one
+        os.environ["HOME"] = str(root / "home")
+
+        from typer.testing import CliRunner
+        from openai import OpenAI
+        from sak.blog import batch_review
+        from sak.main import app
+        from sak.utils import DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS
+        from sak.utils.fake_server import FakeServer
+
+        batch_review.BATCH_POLL_SECONDS = 0
+        posts = root / "posts"
+        posts.mkdir()
+        for number in range(POSTS):
+            (posts / f"post-{number}.md").write_text(POST.format(number=number))
+        results = posts / "reviews.jsonl"
+
+        failed = False
+
+        def check(name: str, ok: bool, detail: str = ""):
+            nonlocal failed
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':4} {name}" + (f" ({detail})" if detail else ""))
+
+        with FakeServer(batch_polls=2) as server:
+            os.environ.update(server.env())
+            runner = CliRunner()
+
+            def review(*args: str):
+                # (exit code, chat requests the run sent, output)
+                before = server.requests["chat", 200]
+                result = runner.invoke(
+                    app, ["blog", "review", "--batch", str(posts), "--no-cache", *args]
+                )
+                return result.exit_code, server.requests["chat", 200] - before, result.output
+
+            code, sent, _ = review()
+            check(
+                "first run reviews every post",
+                code == 0 and sent == POSTS and len(result_lines(results)) == POSTS,
+                f"exit {code}, {sent} sent",
+            )
+
+            code, sent, _ = review()
+            check("a second run skips posts already reviewed", code == 0 and sent == 0, f"{sent} sent")
+
+            # an interrupted run: two results written and a third cut off half way
+            kept = results.read_text().splitlines()[:2]
+            results.write_text("\n".join(kept) + '\n{"path": "cut sho')
+            code, sent, _ = review()
+            hashes = {line["request_hash"] for line in result_lines(results)}
+            check(
+                "an interrupted run resumes where it stopped",
+                code == 0 and sent == POSTS - 2 and len(hashes) == POSTS,
+                f"{sent} sent, {len(hashes)} results",
+            )
+
+            changed = posts / "post-0.md"
+            changed.write_text(changed.read_text() + "\nA new paragraph.\n")
+            code, sent, _ = review()
+            check("a changed post is reviewed again", code == 0 and sent == 1, f"{sent} sent")
+
+            provider_results = root / "provider.jsonl"
+            before = server.requests.copy()
+            code, sent, output = review("--provider-batch", "--results", str(provider_results))
+            requests = server.requests - before
+            check(
+                "a provider batch is submitted, polled and collected",
+                code == 0
+                and sent == 0
+                and requests["files", 200] == 1
+                and requests["batches", 200] == 1
+                and requests["batch", 200] == 3
+                and requests["file content", 200] == 1
+                and len(result_lines(provider_results)) == POSTS
+                and not batch_review._pending_path(provider_results).exists(),
+                f"exit {code}, {dict(requests)}",
+            )
+
+            # a run stopped right after submitting leaves only the batch behind, and two
+            # posts were written after it was sent
+            resumed_results = root / "resumed.jsonl"
+            items = [
+                batch_review.BatchItem(post, DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS)
+                for post in sorted(posts.glob("*.md"))[: POSTS - 2]
+            ]
+            batch_id = batch_review.submit_batch(
+                OpenAI(), items, DEFAULT_AI_MODEL, resumed_results
+            )
+            before = server.requests.copy()
+            code, _, output = review("--provider-batch", "--results", str(resumed_results))
+            requests = server.requests - before
+            check(
+                "a submitted provider batch is collected rather than sent again",
+                code == 0
+                and f"Resuming batch {batch_id}" in output
+                and requests["batches", 200] == 0
+                and len(result_lines(resumed_results)) == POSTS - 2
+                and "2 posts weren't in the batch" in output,
+                f"exit {code}, {dict(requests)}",
+            )
+
+            code, _, output = review("--provider-batch", "--results", str(resumed_results))
+            check(
+                "the posts left out of it go in the next batch",
+                code == 0 and len(result_lines(resumed_results)) == POSTS,
+                f"exit {code}",
+            )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Compares the single-pass Medium image rewrite against the previous
+per-image rescan on a synthetic 5k-line post with 50 images.
+
+    uv run python benchmarks/image_rewrite.py
+"""
+
+import timeit
+from sak.blog.renderers import replace_images
+
+LINES = 5_000
+IMAGES = 50
+RUNS = 20
+
+
+def legacy_replace_image(content: str, image_str: str, image_url: str, alt_text: str):
+    # the rewrite used before: split and rescan the whole post for every image
+    lines = content.split("\n")
+    for i, line in enumerate(lines):
+        if image_str in line:
+            lines[i] = f'<img src="{image_url}" alt="{alt_text}">'
+    return "\n".join(lines)
+
+
+def build_post() -> tuple[str, dict[str, str]]:
+    image_every = LINES // IMAGES
+    lines = []
+    image_tags = {}
+    for i in range(LINES):
+        if i % image_every == 0:
+            n = len(image_tags)
+            url = f"https://example.com/images/diagram-{n}.png"
+            lines.append(f"![Diagram {n}]({url})")
+            image_tags[url] = f'<img src="https://cdn.medium.com/{n}.jpeg" alt="Diagram {n}">'
+        else:
+            lines.append(f"Line {i} of some prose about Python, with `code` and a [link](https://example.com/{i}).")
+    return "\n".join(lines), image_tags
+
+
+def main():
+    content, image_tags = build_post()
+    def legacy():
+        result = content
+        for n, (url, tag) in enumerate(image_tags.items()):
+            result = legacy_replace_image(
+                result, url, f"https://cdn.medium.com/{n}.jpeg", f"Diagram {n}"
+            )
+        return result
+
+    def single_pass():
+        return replace_images(content, image_tags)
+
+    assert legacy() == single_pass(), "rewrites differ"
+
+    legacy_time = min(timeit.repeat(legacy, number=1, repeat=RUNS))
+    single_time = min(timeit.repeat(single_pass, number=1, repeat=RUNS))
+
+    print(f"{LINES} lines, {IMAGES} images (best of {RUNS})")
+    print(f"per-image rescan: {legacy_time * 1000:8.2f}ms")
+    print(f"single pass:      {single_time * 1000:8.2f}ms")
+    print(f"speed-up:         {legacy_time / single_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
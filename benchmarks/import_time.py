@@ -0,0 +1,102 @@
+"""
+Cold-start import budget for the `sak` CLI.
+
+Runs each scenario in a fresh interpreter with `-X importtime` and fails if a
+heavy dependency gets imported or the total import time goes over budget.
+
+    uv run python benchmarks/import_time.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+# modules that must only be imported once a command that needs them is run
+HEAVY_MODULES = [
+    "openai",
+    "httpx",
+    "PIL",
+    "cairosvg",
+    "emoji",
+    "yaml",
+    "pyperclip",
+    "validators",
+]
+
+# (name, argv, env, forbidden modules, budget in milliseconds)
+SCENARIOS = [
+    ("version", ["version"], {}, HEAVY_MODULES + ["pydantic"], 200),
+    ("help", ["--help"], {}, HEAVY_MODULES + ["pydantic"], 250),
+    # builds the short help of every blog command, so every lazy subcommand is imported
+    ("blog help", ["blog", "--help"], {}, HEAVY_MODULES, 450),
+    (
+        "completion",
+        [],
+        {"_SAK_COMPLETE": "complete_bash", "COMP_WORDS": "sak bl", "COMP_CWORD": "1"},
+        HEAVY_MODULES + ["pydantic"],
+        200,
+    ),
+    (
+        "blog completion",
+        [],
+        {"_SAK_COMPLETE": "complete_bash", "COMP_WORDS": "sak blog p", "COMP_CWORD": "2"},
+        HEAVY_MODULES,
+        300,
+    ),
+]
+
+RUN_APP = "from sak.main import app; app(prog_name='sak')"
+
+
+def measure(argv: list[str], env: dict[str, str]) -> tuple[float, set[str], int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_APP, *argv],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+    )
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        total_us += int(self_us)
+        modules.add(name.strip().split(".")[0])
+
+    # a scenario that crashes on an import looks fast, so its exit code is checked too
+    return total_us / 1000, modules, result.returncode
+
+
+def main() -> int:
+    failed = False
+    for name, argv, env, forbidden, budget in SCENARIOS:
+        timings = []
+        exit_codes = set()
+        for _ in range(RUNS):
+            elapsed, modules, exit_code = measure(argv, env)
+            timings.append(elapsed)
+            exit_codes.add(exit_code)
+
+        median = statistics.median(timings)
+        leaked = sorted(set(forbidden) & modules)
+        crashed = sorted(exit_codes - {0})
+        ok = median <= budget and not leaked and not crashed
+        failed |= not ok
+
+        status = "ok" if ok else "FAIL"
+        print(f"{status:4} {name:16} {median:7.1f}ms (budget {budget}ms)")
+        if leaked:
+            print(f"     imported: {', '.join(leaked)}")
+        if crashed:
+            print(f"     exited with: {', '.join(str(code) for code in crashed)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
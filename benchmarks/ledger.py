@@ -0,0 +1,79 @@
+"""
+Checks that model calls which fail still show up in `sak stats`: every chat request to the
+local stand-in OpenAI server fails, and each way of querying the model must leave an error
+in the ledger.
+
+    uv run python benchmarks/ledger.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+POST = """---
+title: Ledger Post
+---
+
+An introduction.
+
+## Part one
+
+Some words about part one.
+"""
+
+# every review mode that reaches the model through a different query function
+MODES = {
+    "a plain review": [],
+    "a streamed review": ["--stream"],
+    "a chunked review": ["--chunked"],
+}
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory(prefix="sak-ledger-") as tmp:
+        root = Path(tmp)
+        # the caches and ledger live under the home directory, keep them out of the real one
+        os.environ["HOME"] = str(root / "home")
+
+        from typer.testing import CliRunner
+        from sak.main import app
+        from sak.utils.fake_server import FakeServer, Faults
+
+        post = root / "post.md"
+        post.write_text(POST)
+
+        failed = False
+
+        def check(name: str, ok: bool, detail: str = ""):
+            nonlocal failed
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':4} {name}" + (f" ({detail})" if detail else ""))
+
+        runner = CliRunner()
+
+        def errors() -> int:
+            # the Errors column of the spend by model table
+            output = runner.invoke(app, ["stats"], env={"COLUMNS": "200"}).output
+            table = output.split("Model spend by model")[1].split("Model spend by month")[0]
+            counts = re.findall(r"^│ \S+\s+│\s+\d+ │.*│\s+(\d*) │", table, re.MULTILINE)
+            return sum(int(count) for count in counts if count)
+
+        with FakeServer(faults=Faults(failures=1.0)) as server:
+            os.environ.update(server.env())
+            for name, args in MODES.items():
+                before = errors()
+                result = runner.invoke(app, ["blog", "review", str(post), "--no-cache", *args])
+                after = errors()
+                check(
+                    f"{name} that fails is counted in the Errors column",
+                    result.exit_code == 1 and after > before,
+                    f"exit {result.exit_code}, errors {before} -> {after}",
+                )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
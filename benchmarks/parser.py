@@ -0,0 +1,249 @@
+"""
+Times BlogPostParser on synthetic Material for MkDocs posts, stage by stage, and fails
+if anything got slower than the stored baseline by more than the threshold.
+Everything runs offline, nothing is uploaded or fetched.
+
+    uv run python benchmarks/parser.py                  # compare with the baseline
+    uv run python benchmarks/parser.py --update         # rewrite the baseline
+    uv run python benchmarks/parser.py --threshold 1.5  # allow 50% before failing
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+import yaml
+from pathlib import Path
+from typing import Callable, NamedTuple
+from sak.blog.blog_parser import BlogPostParser
+from sak.blog.renderers import find_images, render_dev
+from sak.blog.transforms import Pipeline
+
+RUNS = 5
+BASELINE = Path(__file__).parent / "baselines" / "parser.json"
+DEFAULT_THRESHOLD = 1.25
+
+# stages quicker than this are all noise, so they never count as a regression
+NOISE_FLOOR_MS = 0.5
+
+WORDS = (
+    "python async parser markdown admonition image upload cache token request "
+    "response pipeline stage header excerpt canonical medium dev blog post"
+).split()
+EMOJI = [":rocket:", ":snake:", ":zap:", ":tada:", ":bulb:", ":warning:"]
+NOTES = ["note", "tip", "warning", "danger", "info", "example"]
+
+
+class Profile(NamedTuple):
+    kb: int
+    # how many paragraphs go between each of these, 0 for none at all
+    admonition_every: int
+    image_every: int
+    emoji_every: int
+    fence_every: int
+    include_every: int
+
+
+CORPORA = {
+    "small": Profile(4, 6, 8, 4, 6, 0),
+    "medium": Profile(32, 6, 8, 4, 6, 12),
+    "large": Profile(256, 6, 8, 4, 6, 12),
+    "admonitions": Profile(64, 1, 0, 0, 0, 0),
+    "images": Profile(64, 0, 1, 0, 0, 0),
+    "emoji": Profile(64, 0, 0, 1, 0, 0),
+    "code": Profile(64, 0, 0, 0, 1, 2),
+}
+
+FRONT_MATTER = """---
+draft: false
+authors:
+  - tim
+date:
+  created: 2024-05-01
+categories:
+  - Python
+tags:
+  - python-tips
+  - dev-tools
+description: A synthetic post for the parser benchmark.
+title: Parser Benchmark
+---
+"""
+
+
+def paragraph(rng: random.Random, emoji: bool) -> str:
+    words = rng.choices(WORDS, k=rng.randint(30, 80))
+    if emoji:
+        for _ in range(3):
+            words.insert(rng.randrange(len(words)), rng.choice(EMOJI))
+    return " ".join(words).capitalize() + "."
+
+
+def admonition(rng: random.Random) -> str:
+    marker = rng.choice(["!!!", "???", "???+"])
+    note = rng.choice(NOTES)
+    body = [f"    {paragraph(rng, False)}" for _ in range(rng.randint(1, 3))]
+    if rng.random() < 0.3:
+        # nested admonition
+        body += ["", f"    !!! {rng.choice(NOTES)}", "", f"        {paragraph(rng, False)}"]
+    return f'{marker} {note} "{note.title()} title"\n\n' + "\n\n".join(body)
+
+
+def image(n: int) -> str:
+    return f"![Diagram {n}](https://example.com/images/diagram-{n}.png){{ loading=lazy }}"
+
+
+def fence(rng: random.Random, include: bool) -> str:
+    lines = [f"    value_{i} = await fetch({i})  # :rocket: stays as is" for i in range(rng.randint(3, 15))]
+    if include:
+        lines.insert(0, '--8<-- "snippets/example.py"')
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def generate_post(profile: Profile, seed: int = 0) -> str:
+    """Build a post of about `profile.kb` kilobytes, the same one every time for a seed."""
+    rng = random.Random(seed)
+    blocks = [FRONT_MATTER, image(0).replace("Diagram 0", "main-image"), paragraph(rng, True), "<!-- more -->"]
+    size = sum(len(block) for block in blocks)
+    images = 0
+
+    def every(n: int, i: int) -> bool:
+        return n > 0 and i % n == 0
+
+    i = 0
+    while size < profile.kb * 1024:
+        i += 1
+        block = [paragraph(rng, every(profile.emoji_every, i))]
+        if i % 8 == 0:
+            block.insert(0, f"## Section {i // 8}")
+        if every(profile.admonition_every, i):
+            block.append(admonition(rng))
+        if every(profile.image_every, i):
+            images += 1
+            block.append(image(images))
+        if every(profile.fence_every, i):
+            block.append(fence(rng, every(profile.include_every, i)))
+        elif every(profile.include_every, i):
+            block.append('--8<-- "snippets/footer.md"')
+        text = "\n\n".join(block)
+        blocks.append(text)
+        size += len(text) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def best_of(func: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def stages(post: str) -> dict[str, Callable[[], object]]:
+    parser = BlogPostParser.__new__(BlogPostParser)
+    front_matter, body = post.split("---\n", 2)[1:]
+    parsed = parser._parse_blog(post)
+
+    timed = {
+        "front matter": lambda: yaml.safe_load(front_matter),
+        # the cost every stage below pays before doing any work of its own
+        "tokenize": lambda: Pipeline().run(body),
+    }
+    for name in ("excerpt", "admonitions", "headers", "emoji", "includes"):
+        timed[name] = lambda pipeline=Pipeline(name): pipeline.run(body)
+    timed["find images"] = lambda: find_images(parsed.content)
+    timed["render dev"] = lambda: render_dev(parsed)
+    timed["_parse_blog"] = lambda: parser._parse_blog(post)
+    return timed
+
+
+def run() -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    total_bytes = 0
+    total_ms = 0.0
+
+    print(f"{'corpus':12} {'size':>8} {'parse':>10} {'MB/s':>8} {'posts/s':>8} {'peak mem':>10}")
+    for corpus, profile in CORPORA.items():
+        post = generate_post(profile)
+        size = len(post.encode())
+        timed = stages(post)
+
+        results[corpus] = {name: best_of(func) for name, func in timed.items()}
+        parse_ms = results[corpus]["_parse_blog"]
+        peak = peak_memory(timed["_parse_blog"])
+        total_bytes += size
+        total_ms += parse_ms
+
+        print(
+            f"{corpus:12} {size / 1024:>6.0f}KB {parse_ms:>8.2f}ms "
+            f"{size / 1024**2 / (parse_ms / 1000):>8.1f} {1000 / parse_ms:>8.0f} {peak / 1024:>8.0f}KB"
+        )
+
+    print(
+        f"{'all':12} {total_bytes / 1024:>6.0f}KB {total_ms:>8.2f}ms "
+        f"{total_bytes / 1024**2 / (total_ms / 1000):>8.1f} {len(CORPORA) * 1000 / total_ms:>8.0f}"
+    )
+
+    names = list(next(iter(results.values())))
+    print(f"\n{'stage (ms)':12} " + " ".join(f"{corpus:>11}" for corpus in CORPORA))
+    for name in names:
+        print(f"{name:12} " + " ".join(f"{results[corpus][name]:>11.2f}" for corpus in CORPORA))
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], threshold: float) -> bool:
+    if not BASELINE.exists():
+        print(f"\nNo baseline at {BASELINE}, run with --update to store one.")
+        return True
+
+    baseline = json.loads(BASELINE.read_text())
+    slower = []
+    for corpus, timings in results.items():
+        for name, elapsed in timings.items():
+            before = baseline.get(corpus, {}).get(name)
+            if before is None or elapsed - before < NOISE_FLOOR_MS:
+                continue
+            if elapsed > before * threshold:
+                slower.append(f"{corpus} / {name}: {before:.2f}ms -> {elapsed:.2f}ms")
+
+    if slower:
+        print(f"\nSlower than the baseline by more than {threshold:.2f}x:")
+        for line in slower:
+            print(f"FAIL {line}")
+        return False
+    print(f"\nok   nothing slower than the baseline by more than {threshold:.2f}x")
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--update", action="store_true", help="rewrite the stored baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run()
+    if args.update:
+        BASELINE.parent.mkdir(exist_ok=True)
+        rounded = {
+            corpus: {name: round(elapsed, 3) for name, elapsed in timings.items()}
+            for corpus, timings in results.items()
+        }
+        BASELINE.write_text(json.dumps(rounded, indent=2) + "\n")
+        print(f"\nBaseline written to {BASELINE}")
+        return 0
+    return 0 if compare(results, args.threshold) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
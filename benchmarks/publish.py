@@ -0,0 +1,104 @@
+"""
+Checks `sak blog publish --dry-run` against the local stand-in servers with posts whose
+names clash, a.md next to a/index.md: each keeps its own summary row, dry run output and
+canonical URL.
+
+    uv run python benchmarks/publish.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+POST = """---
+draft: false
+authors:
+  - sak
+date:
+  created: 2024-05-01
+categories:
+  - Checks
+tags:
+  - publish
+description: A post published by the publish check.
+title: {title}
+---
+
+![main-image]({image})
+
+A post called {title}.
+
+<!-- more -->
+
+## Part one
+
+Some words about {title}.
+"""
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory(prefix="sak-publish-") as tmp:
+        root = Path(tmp)
+        # the caches and dry run output live under the home directory
+        os.environ["HOME"] = str(root / "home")
+
+        from typer.testing import CliRunner
+        from sak.main import app
+        from sak.utils import CACHE_DIR
+        from sak.utils.fake_server import FakeServer
+
+        failed = False
+
+        def check(name: str, ok: bool, detail: str = ""):
+            nonlocal failed
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':4} {name}" + (f" ({detail})" if detail else ""))
+
+        with FakeServer() as server:
+            os.environ.update(server.env())
+            posts = root / "posts"
+            (posts / "a").mkdir(parents=True)
+            for path, title in [(posts / "a.md", "Flat"), (posts / "a" / "index.md", "Folder")]:
+                path.write_text(POST.format(title=f"{title} Post", image=server.image_url(title)))
+
+            result = CliRunner().invoke(
+                app,
+                [
+                    "blog",
+                    "publish",
+                    str(posts),
+                    "https://example.com/{slug}",
+                    "--dry-run",
+                ],
+                env={"COLUMNS": "200"},
+            )
+
+        rows = re.findall(r"^│ (\S+)\s+│ Done\s+│ Done\s+│$", result.output, re.MULTILINE)
+        check(
+            "posts with clashing names get a summary row each",
+            result.exit_code == 0 and sorted(rows) == ["a", "a-index"],
+            f"exit {result.exit_code}, rows {rows}",
+        )
+
+        drafts = {
+            folder.name: (folder / "Medium.md").read_text()
+            for folder in (CACHE_DIR / "dry-run").iterdir()
+        }
+        check(
+            "each keeps its own dry run output",
+            "Flat Post" in drafts.get("a", "") and "Folder Post" in drafts.get("a-index", ""),
+            f"{sorted(drafts)}",
+        )
+        check(
+            "each gets its own canonical URL",
+            "https://example.com/a)" in drafts.get("a", "")
+            and "https://example.com/a-index)" in drafts.get("a-index", ""),
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Checks `sak blog review --incremental` against the local stand-in OpenAI server when a
+reply leaves sections out. The stand-in fills every integer in a structured reply with 3,
+so each reply only ever reviews the third section: the first two must be asked for again
+on every run rather than replayed from the cache, and the third never sent again.
+
+    uv run python benchmarks/section_review.py
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+POST = """---
+title: Section Review Post
+---
+
+An introduction.
+
+## Part one
+
+Some words about part one.
+
+## Part two
+
+Some words about part two.
+"""
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory(prefix="sak-sections-") as tmp:
+        root = Path(tmp)
+        # the caches and ledger live under the home directory, keep them out of the real one
+        os.environ["HOME"] = str(root / "home")
+
+        from typer.testing import CliRunner
+        from sak.main import app
+        from sak.utils.fake_server import FakeServer
+
+        post = root / "post.md"
+        post.write_text(POST)
+
+        failed = False
+
+        def check(name: str, ok: bool, detail: str = ""):
+            nonlocal failed
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':4} {name}" + (f" ({detail})" if detail else ""))
+
+        with FakeServer() as server:
+            os.environ.update(server.env())
+            runner = CliRunner()
+
+            def review():
+                # (exit code, chat requests the run sent, output)
+                before = server.requests["chat", 200]
+                result = runner.invoke(app, ["blog", "review", "--incremental", str(post)])
+                return result.exit_code, server.requests["chat", 200] - before, result.output
+
+            code, sent, output = review()
+            check(
+                "a reply missing sections still reviews the rest",
+                code == 0 and sent == 1 and "3 to review" in output,
+                f"exit {code}, {sent} sent",
+            )
+
+            for run in ["second", "third"]:
+                code, sent, output = review()
+                check(
+                    f"the missing sections are asked for again on the {run} run",
+                    code == 0 and sent == 1 and "2 to review, 1 unchanged" in output,
+                    f"exit {code}, {sent} sent",
+                )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
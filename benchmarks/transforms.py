@@ -0,0 +1,83 @@
+"""
+Checks the markdown transform pipelines against the fixture corpus, then shows how
+parse time and peak memory grow with post size.
+
+    uv run python benchmarks/transforms.py            # check and time
+    uv run python benchmarks/transforms.py --update   # rewrite the expected outputs
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from sak.blog.blog_parser import BlogPostParser
+from sak.blog.renderers import render_dev
+
+FIXTURES = Path(__file__).parent / "fixtures"
+EXPECTED = FIXTURES / "expected"
+SCALES = [1, 4, 16, 64]
+
+
+def render(text: str) -> dict[str, str]:
+    parser = BlogPostParser.__new__(BlogPostParser)
+    post = parser._parse_blog(text)
+    return {"parsed": post.content, "dev": render_dev(post)}
+
+
+def check_fixtures(update: bool) -> bool:
+    ok = True
+    EXPECTED.mkdir(exist_ok=True)
+    for fixture in sorted(FIXTURES.glob("*.md")):
+        for name, output in render(fixture.read_text()).items():
+            expected = EXPECTED / f"{fixture.stem}.{name}.md"
+            if update:
+                expected.write_text(output)
+                continue
+
+            matches = expected.read_text() == output
+            ok &= matches
+            print(f"{'ok' if matches else 'FAIL':4} {expected.name}")
+    return ok
+
+
+def build_post(scale: int) -> str:
+    # one front matter block followed by every fixture's body, repeated
+    fixtures = [fixture.read_text() for fixture in sorted(FIXTURES.glob("*.md"))]
+    front_matter = fixtures[0].split("---\n", 2)[1]
+    bodies = [fixture.split("---\n", 2)[2] for fixture in fixtures]
+    return f"---\n{front_matter}---\n" + "\n".join(bodies * scale)
+
+
+def time_scaling():
+    parser = BlogPostParser.__new__(BlogPostParser)
+
+    print(f"\n{'size':>10} {'time':>10} {'per MB':>10} {'peak mem':>10} {'peak/size':>10}")
+    for scale in SCALES:
+        post = build_post(scale)
+        size = len(post.encode())
+
+        start = time.perf_counter()
+        parser._parse_blog(post)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        parser._parse_blog(post)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{size / 1024:>8.0f}KB {elapsed * 1000:>8.1f}ms "
+            f"{elapsed / (size / 1024**2) * 1000:>8.1f}ms {peak / 1024:>8.0f}KB {peak / size:>10.1f}"
+        )
+
+
+def main() -> int:
+    update = "--update" in sys.argv
+    ok = check_fixtures(update)
+    if not update:
+        time_scaling()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,20 @@
 import typer
-from .review import app as review_app
-from .describe import app as describe_app
-from .title import app as title_app
-from .introduce import app as introduce_app
-from .publish import app as publish_app
-
-app = typer.Typer(no_args_is_help=True, help="Manage blog posts.")
-
-app.add_typer(review_app)
-app.add_typer(describe_app)
-app.add_typer(title_app)
-app.add_typer(introduce_app)
-app.add_typer(publish_app)
+from ..utils import ledger, lazy_group
+
+COMMANDS = {
+    "review": "sak.blog.review:app",
+    "describe": "sak.blog.describe:app",
+    "title": "sak.blog.title:app",
+    "introduce": "sak.blog.introduce:app",
+    "publish": "sak.blog.publish:app",
+    "analyze": "sak.blog.analyze:app",
+    "index": "sak.blog.index:app",
+}
+
+app = typer.Typer(cls=lazy_group(COMMANDS), no_args_is_help=True, help="Manage blog posts.")
+
+
+@app.callback()
+def blog(ctx: typer.Context):
+    # so the ledger can tell which blog command a model call came from
+    ledger.enter_command(ctx.invoked_subcommand)
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+DEFAULT_ACCOUNT_TTL_HOURS = 24 * 7
+
+
+class AccountCache:
+    """
+    Remembers what Medium's /me returned for an API token so a publish doesn't have to
+    ask again. Entries are keyed by a hash of the token, the token itself is never stored.
+
+    One instance is shared by a whole run, so posts published together wait on a single
+    lookup instead of each making their own.
+    """
+
+    filename = "medium_accounts.json"
+
+    def __init__(self, cache_dir: Path, ttl_hours: float = DEFAULT_ACCOUNT_TTL_HOURS):
+        self.path = cache_dir / self.filename
+        self.ttl = ttl_hours * 60 * 60
+        self.lookups: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, entries: dict):
+        # write then rename so a crash never leaves half a file behind
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entries))
+        tmp_path.replace(self.path)
+
+    def get(self, token: str) -> Optional[dict]:
+        entry = self._load().get(self.key(token))
+        if entry is None or time.time() - entry["fetched"] > self.ttl:
+            return None
+        return entry["account"]
+
+    def put(self, token: str, account: dict):
+        entries = self._load()
+        entries[self.key(token)] = {"account": account, "fetched": time.time()}
+        self._save(entries)
+
+    def invalidate(self, token: str):
+        key = self.key(token)
+        self.lookups.pop(key, None)
+        entries = self._load()
+        if entries.pop(key, None) is not None:
+            self._save(entries)
+
+    async def lookup(
+        self, token: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Return the cached account for `token`, calling `fetch` at most once per run on a miss."""
+        key = self.key(token)
+        if key not in self.lookups:
+
+            async def load() -> dict:
+                account = self.get(token)
+                if account is None:
+                    account = await fetch()
+                    self.put(token, account)
+                return account
+
+            self.lookups[key] = asyncio.ensure_future(load())
+
+        task = self.lookups[key]
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # let the next caller try again rather than replaying the failure
+            if self.lookups.get(key) is task:
+                del self.lookups[key]
+            raise
+
+    def entries(self) -> int:
+        return len(self._load())
+
+    def prune(self) -> int:
+        entries = self._load()
+        cutoff = time.time() - self.ttl
+        fresh = {key: entry for key, entry in entries.items() if entry["fetched"] >= cutoff}
+        if len(fresh) != len(entries):
+            self._save(fresh)
+        return len(entries) - len(fresh)
+
+    def clear(self) -> int:
+        removed = len(self._load())
+        self.path.unlink(missing_ok=True)
+        return removed
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import typer
+from rich import print
+from typing import Optional
+from ..utils import DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS, Annotations, Helpers
+from .candidates import prompt_choice
+from .describe import DescriptionResponse, describe_messages, print_descriptions
+from .introduce import IntroResponse, introduce_messages, print_excerpts
+from .reducer import prepare_article
+from .review import ReviewResponse, print_review, review_messages
+from .title import TitleResponse, print_titles, title_messages
+
+app = typer.Typer()
+
+
+def _choose(name: str, options: list[str]) -> Optional[str]:
+    selection = prompt_choice(f"Which {name} would you like to use?", len(options))
+    if selection == Helpers.none_selection:
+        return None
+    return options[selection - 1]
+
+
+@app.command()
+def analyze(
+    filepath: Annotations.filepath,
+    model: Annotations.model = DEFAULT_AI_MODEL,
+    no_cache: Annotations.no_cache = False,
+    refresh: Annotations.refresh = False,
+    max_input_tokens: Annotations.max_input_tokens = DEFAULT_MAX_INPUT_TOKENS,
+):
+    """
+    Review a blog post and generate its titles, descriptions and introductions in one go. Your picks are copied to your clipboard.
+    """
+    import pyperclip
+    from openai import AsyncOpenAI
+
+    Helpers.check_file_exists(filepath)
+    Helpers.validate_model(model)
+
+    content = filepath.read_text()
+    # the review keeps the code, the others share one trimmed article
+    review_content = prepare_article(content, "review", model, max_input_tokens)
+    summary_content = prepare_article(content, "summary", model, max_input_tokens)
+
+    queries = [
+        (review_messages(review_content), ReviewResponse, print_review),
+        (describe_messages(summary_content), DescriptionResponse, print_descriptions),
+        (title_messages(summary_content), TitleResponse, print_titles),
+        (introduce_messages(summary_content), IntroResponse, print_excerpts),
+    ]
+
+    async def query(client: AsyncOpenAI, messages, response_format, show):
+        response = await Helpers.query_gpt_async(
+            client,
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            use_cache=not no_cache,
+            refresh=refresh,
+        )
+        # show each result as soon as it arrives rather than waiting on the slowest
+        show(response)
+        return response
+
+    async def query_all():
+        # one client so every request shares the same connection pool
+        async with AsyncOpenAI() as client:
+            return await asyncio.gather(*[query(client, *q) for q in queries])
+
+    with Helpers.get_spinner("Analysing blog post...") as progress:
+        progress.add_task("")
+        try:
+            _, descriptions, titles, intros = asyncio.run(query_all())
+        except typer.Exit:
+            raise
+        except Exception as e:
+            print(e)
+            raise typer.Exit(code=1)
+
+    title = _choose("title", titles.titles)
+    description = _choose("description", descriptions.descriptions)
+    excerpt = _choose("excerpt", intros.excerpts)
+
+    # laid out to paste straight into the post: front matter, then the excerpt
+    picks = []
+    if title is not None:
+        picks.append(f"title: {json.dumps(title, ensure_ascii=False)}")
+    if description is not None:
+        picks.append(f"description: {json.dumps(description, ensure_ascii=False)}")
+    if excerpt is not None:
+        picks.append(("\n" if picks else "") + excerpt)
+
+    if not picks:
+        print("Nothing copied.")
+        raise typer.Exit()
+
+    pyperclip.copy("\n".join(picks))
+    print("[green]Copied to clipboard![/]")
@@ -0,0 +1,293 @@
+"""
+Reviews every post under a directory, e.g. overnight.
+
+Each finished review is appended to a JSONL results file as soon as it arrives, keyed by
+a hash of the request. Posts whose request already has a result are skipped, so a run
+that was interrupted picks up where it left off and unchanged posts are never re-sent.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import typer
+from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel
+from rich import print
+from ..utils import Helpers, ledger
+from ..utils.helpers import Usage
+from .reducer import reduce_article
+from .review import ReviewResponse, review_messages
+
+# how often to check on a batch submitted to the provider
+BATCH_POLL_SECONDS = 30
+
+
+class BatchItem:
+    def __init__(self, path: Path, model: str, max_input_tokens: int):
+        self.path = path
+        content = path.read_text()
+        self.post_hash = ledger.post_hash(content)
+        self.messages = review_messages(
+            reduce_article(content, "review", model, max_input_tokens).content
+        )
+        request = json.dumps([model, self.messages], sort_keys=True)
+        self.request_hash = hashlib.sha256(request.encode()).hexdigest()
+
+
+def read_results(results_path: Path) -> set[str]:
+    # a line cut short by an interrupted run is ignored and its post reviewed again
+    done = set()
+    if not results_path.exists():
+        return done
+    for line in results_path.read_text().splitlines():
+        try:
+            done.add(json.loads(line)["request_hash"])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            continue
+    return done
+
+
+def end_partial_line(results_path: Path):
+    # so the next result doesn't run on from a line an interrupted run left unfinished
+    if not results_path.exists() or not results_path.stat().st_size:
+        return
+    with results_path.open("rb+") as f:
+        f.seek(-1, 2)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def append_result(results_path: Path, item: BatchItem, model: str, review: ReviewResponse):
+    record = {
+        "path": str(item.path),
+        "request_hash": item.request_hash,
+        "model": model,
+        "reviewed": time.time(),
+        "review": review.model_dump(),
+    }
+    with results_path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def print_summary_line(item: BatchItem, review: ReviewResponse):
+    ratings = ", ".join(f"{field} {value.rating}" for field, value in review)
+    print(f"[green]✓[/] {item.path}: {ratings}")
+
+
+async def _review_all(
+    items: list[BatchItem],
+    model: str,
+    concurrency: int,
+    results_path: Path,
+    usages: list[Usage],
+    use_cache: bool,
+    refresh: bool,
+) -> int:
+    from openai import AsyncOpenAI
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def review(client: AsyncOpenAI, item: BatchItem):
+        nonlocal failed
+        # each review runs in its own task, so this only applies to this post's call
+        ledger.current_post.set(item.post_hash)
+        async with semaphore:
+            try:
+                response = await Helpers.query_gpt_async(
+                    client,
+                    model=model,
+                    messages=item.messages,
+                    response_format=ReviewResponse,
+                    use_cache=use_cache,
+                    refresh=refresh,
+                    on_usage=usages.append,
+                )
+            except typer.Exit:
+                # already reported, the post is retried on the next run
+                print(f"[red]✗[/] {item.path}")
+                failed += 1
+                return
+        append_result(results_path, item, model, response)
+        print_summary_line(item, response)
+
+    async with AsyncOpenAI() as client:
+        await asyncio.gather(*[review(client, item) for item in items])
+    return failed
+
+
+def response_format(model: type[BaseModel]) -> dict:
+    # what the SDK's parse helpers send, built from the model's own schema
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": model.model_json_schema(),
+            "strict": True,
+        },
+    }
+
+
+def _pending_path(results_path: Path) -> Path:
+    return results_path.with_suffix(".batch.json")
+
+
+def submit_batch(client, items: list[BatchItem], model: str, results_path: Path) -> str:
+    """Upload the reviews as a provider batch and save its id next to the results file."""
+    import io
+
+    lines = [
+        json.dumps(
+            {
+                "custom_id": item.request_hash,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": item.messages,
+                    "response_format": response_format(ReviewResponse),
+                },
+            }
+        )
+        for item in items
+    ]
+    batch_file = client.files.create(
+        file=("reviews.jsonl", io.BytesIO("\n".join(lines).encode())),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    # what was sent, so a run that collects it knows which reviews to expect
+    pending = {"batch_id": batch.id, "custom_ids": [item.request_hash for item in items]}
+    _pending_path(results_path).write_text(json.dumps(pending))
+    return batch.id
+
+
+def _provider_batch(
+    items: list[BatchItem], model: str, results_path: Path
+) -> tuple[int, int]:
+    """
+    Send every review through the provider's batch API, which is cheaper but can take
+    hours. The batch id is saved next to the results file, so a later run can collect it.
+    Returns how many reviews were in the batch and how many of those didn't come back.
+    """
+    from openai import OpenAI
+
+    client = OpenAI()
+    pending_path = _pending_path(results_path)
+    by_hash = {item.request_hash: item for item in items}
+
+    if pending_path.exists():
+        pending = json.loads(pending_path.read_text())
+        batch_id = pending["batch_id"]
+        submitted = set(pending["custom_ids"])
+        print(f"[yellow]Resuming batch[/] {batch_id} with {len(submitted)} reviews")
+    else:
+        batch_id = submit_batch(client, items, model, results_path)
+        submitted = set(by_hash)
+        print(f"[yellow]Submitted batch[/] {batch_id} with {len(items)} reviews")
+
+    with Helpers.get_spinner("Waiting on the batch...") as progress:
+        progress.add_task("")
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            time.sleep(BATCH_POLL_SECONDS)
+
+    usages: list[Usage] = []
+    if batch.output_file_id:
+        output = client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            result = json.loads(line)
+            item = by_hash.get(result["custom_id"])
+            response = result.get("response") or {}
+            if item is None or response.get("status_code") != 200:
+                continue
+            body = response["body"]
+            review = ReviewResponse.model_validate_json(
+                body["choices"][0]["message"]["content"]
+            )
+            usage = Usage(
+                model,
+                body["usage"]["prompt_tokens"],
+                body["usage"]["completion_tokens"],
+                0,
+                "off",
+                model_version=body["model"],
+            )
+            usages.append(usage)
+            # there's no latency for a single request in a batch
+            ledger.current_post.set(item.post_hash)
+            Helpers.record_usage(usage, 0.0)
+            append_result(results_path, item, model, review)
+            print_summary_line(item, review)
+
+    pending_path.unlink()
+    if batch.status != "completed":
+        print(f"[bold red]Batch {batch_id} {batch.status}.")
+    if usages:
+        Helpers.show_usage(Helpers.combine_usage(usages))
+        print("[yellow]Batch requests are billed at a discount, so the cost above is an upper bound.")
+    # one usage per review that came back, posts that weren't in the batch aren't failures
+    return len(submitted), len(submitted) - len(usages)
+
+
+def review_batch(
+    pattern: str,
+    model: str,
+    concurrency: int,
+    max_input_tokens: int,
+    results_path: Optional[Path],
+    provider_batch: bool,
+    use_cache: bool = True,
+    refresh: bool = False,
+):
+    posts = Helpers.find_posts(pattern)
+    if results_path is None:
+        results_path = Path(pattern if Path(pattern).is_dir() else ".") / "reviews.jsonl"
+
+    done = read_results(results_path)
+    end_partial_line(results_path)
+    items = [BatchItem(post, model, max_input_tokens) for post in posts]
+    queued = [item for item in items if item.request_hash not in done]
+    print(
+        f"[yellow]Posts:[/] {len(queued)} to review, "
+        f"{len(items) - len(queued)} already in {results_path}"
+    )
+    if not queued:
+        return
+
+    usages: list[Usage] = []
+    try:
+        if provider_batch:
+            sent, failed = _provider_batch(queued, model, results_path)
+        else:
+            sent = len(queued)
+            failed = asyncio.run(
+                _review_all(
+                    queued, model, concurrency, results_path, usages, use_cache, refresh
+                )
+            )
+    except typer.Exit:
+        raise
+    except Exception as e:
+        print(e)
+        raise typer.Exit(code=1)
+    if usages:
+        Helpers.show_usage(Helpers.combine_usage(usages))
+
+    print(f"Reviewed {sent - failed} of {sent} posts into {results_path}")
+    if sent < len(queued):
+        print(
+            f"[yellow]{len(queued) - sent} posts weren't in the batch, "
+            "run the same command again to review them."
+        )
+    if failed:
+        print(f"[bold red]{failed} failed, run the same command again to retry them.")
+        raise typer.Exit(code=1)
@@ -1,196 +1,184 @@
-from pydantic import BaseModel
-from datetime import datetime
 import yaml
-import emoji
 import httpx
-import json
 import os
 import re
 import copy
+import asyncio
+import io
 from typing import Optional
 from rich import print
 from pathlib import Path
-from PIL import Image
-import cairosvg
-
-class BlogParserError(Exception):
-    pass
-
-class FrontMatter(BaseModel):
-    draft: bool
-    authors: list[str]
-    date: datetime
-    categories: list[str]
-    tags: list[str]
-    description: str
-    title: str
-    main_image: str
-    series: Optional[str] = None
+from .account_cache import AccountCache
+from .errors import BlogParserError
+from .image_cache import ImageCache
+from .models import BlogPost, FrontMatter
+from .renderers import find_images, render_dev, render_medium
+from .transforms import NOTE_TYPES, Pipeline
+from ..utils import CACHE_DIR, DEFAULT_IMAGE_CONCURRENCY, ledger, trace
+from ..utils.transport import Transport, api_url
 
+class BlogPostParser:
+    # map for converting admonitions into a "quote with relevant emoji"
+    note_types = NOTE_TYPES
 
-class BlogPost(BaseModel):
-    content: str
-    meta: FrontMatter
+    # transforms shared by every platform, the rest happen in the renderers
+    parse_pipeline = Pipeline("excerpt", "admonitions", "headers", "emoji", "includes")
 
+    main_image_pattern = re.compile(rf'^(.*{re.escape("main-image")}.*)$', re.MULTILINE)
+    url_pattern = re.compile(r"\((https?://[^\s\)]+)\)")
 
-class BlogPostParser:
-    # map for converting admonitions into a "quote with relevant emoji"
-    note_types = {
-        "note": ":memo:",
-        "abstract": ":notebook:",
-        "info": ":information:",
-        "tip": ":fire:",
-        "success": ":check_mark_button:",
-        "question": ":red_question_mark:",
-        "warning": ":warning:",
-        "failure": ":cross_mark:",
-        "danger": ":radioactive:",
-        "bug": ":cockroach:",
-        "example": ":test_tube:",
-        "quote": ":speaking_head:",
-    }
-
-    admonition_pattern = re.compile(
-        r'[!?]{3} (\w+)(?:\s+"([^"]+)")?\n\n((?:\s{4}.*\n?)+)'
-    )
-    main_image_pattern = rf'^(.*{re.escape("main-image")}.*)$'
-    url_pattern = r"\((https?://[^\s\)]+)\)"
-    md_image_pattern = r"!\[(.*?)\]\((https?://[^\s\)]+)\)"
-    curly_brace_pattern = r"(!\[.*?\]\(https?://[^\)]+\))\s*\{.*?\}"
-
-    medium_api = "https://api.medium.com/v1"
-    dev_api = "https://dev.to/api/articles"
-
-    def __init__(self, blog_post: str):
-        self.sak_cache = Path.home() / ".cache" / "sak"
+    def __init__(self, blog_post: str, name: str = "post"):
+        self.sak_cache = CACHE_DIR
         self.sak_cache.mkdir(parents=True, exist_ok=True)
 
-        self.medium_blog = self._parse_blog(blog_post)
-        self.dev_blog = copy.deepcopy(self.medium_blog)
-        self.linkedin_blog = copy.deepcopy(self.medium_blog)
-        print(self.medium_blog.meta)
+        # point at another server, e.g. `sak loadtest serve`, instead of the real APIs
+        self.medium_api = api_url("Medium")
+        self.dev_api = api_url("Dev.to")
 
-    def _replace_headers(self, content: str) -> str:
-        # Turn level 2 headers into level 1 and level 3 headers into level 2
-        content = content.replace("##", "#")
-        return content.replace("###", "##")
+        # used to keep each post's dry run output apart
+        self.name = name
+        self.post_hash = ledger.post_hash(blog_post)
+        self.post = self._parse_blog(blog_post)
 
     def _format_tag(self, tag: str):
         # remove spaces and hyphens
         return tag.replace("-", " ").title().replace(" ", "")
 
-    def _find_all_images(self, content: str) -> list[str]:
-        matches = re.findall(self.md_image_pattern, content)
-        return matches
-
-    def _remove_curly_brace_content(self, content: str):
-        # This is the extra css that can be passed into material for mkdocs
-        return re.sub(self.curly_brace_pattern, r"\1", content, flags=re.MULTILINE)
-
-    def _upload_image_to_medium(
-        self, content: str, image_str: str, alt_text: str
-    ) -> str:
-        # download and convert image
-        r = httpx.get(image_str)
-        r.raise_for_status()
-        og_name = image_str.split("/")[-1]
-        image_filename = Path(og_name)
+    def _convert_image(
+        self,
+        data: bytes,
+        og_name: str,
+        extension: str,
+        debug_dir: Optional[Path] = None,
+    ) -> bytes:
+        # imported here as it is only needed for Medium images
+        from PIL import Image
 
-        content_type = r.headers["Content-Type"]
-        extension = content_type.split("/")[-1]
-        extension = "svg" if extension == "svg+xml" else extension
-
-        with image_filename.open("wb") as f:
-            f.write(r.content)
+        # everything stays in memory, intermediates only hit disk when debugging
+        if debug_dir is not None:
+            (debug_dir / og_name).write_bytes(data)
 
         if extension == "svg":
-            png = Path(f"{og_name}.png")
-            cairosvg.svg2png(url=image_filename.name, write_to=png.name)
-            image_filename.unlink()
-            image_filename = png
-
-        image = Image.open(image_filename.name)
-        image_filename.unlink()
-        image_filename = Path(f"{og_name}.jpeg")
-        rgb_image = image.convert("RGB")
-        rgb_image.save(image_filename.name, "JPEG")
-
-        # upload to medium
-        token = os.getenv("MEDIUM_API_KEY")
-        if token is None:
-            raise BlogParserError("MEDIUM_API_KEY is not found.")
+            # only SVGs need it, and it fails to import without the system's libcairo
+            import cairosvg
+
+            with trace.span("cairosvg", bytes=len(data)):
+                data = cairosvg.svg2png(bytestring=data)
+            if debug_dir is not None:
+                (debug_dir / f"{og_name}.png").write_bytes(data)
+
+        with trace.span("PIL", bytes=len(data)):
+            with Image.open(io.BytesIO(data)) as image:
+                rgb_image = image.convert("RGB")
+
+            jpeg = io.BytesIO()
+            rgb_image.save(jpeg, "JPEG")
+        if debug_dir is not None:
+            (debug_dir / f"{og_name}.jpeg").write_bytes(jpeg.getbuffer())
+
+        return jpeg.getvalue()
+
+    async def _upload_image_to_medium(
+        self,
+        transport: Transport,
+        semaphore: asyncio.Semaphore,
+        image_cache: ImageCache,
+        token: str,
+        image_str: str,
+        debug_dir: Optional[Path] = None,
+    ) -> str:
+        async with semaphore:
+            # download and convert image
+            with trace.span("download") as span:
+                r = await transport.get(image_str)
+                r.raise_for_status()
+                span.set(bytes=len(r.content))
+
+            # skip the conversion and upload if this exact image was uploaded before
+            image_size = len(r.content)
+            cache_key = image_cache.key(image_str, r.content)
+            cached_url = image_cache.get(cache_key)
+            if cached_url is not None:
+                return cached_url
+
+            og_name = image_str.split("/")[-1]
+            if debug_dir is not None:
+                # keep images with the same name from different hosts/paths apart
+                debug_dir = debug_dir / cache_key[:12]
+                debug_dir.mkdir(parents=True, exist_ok=True)
+
+            content_type = r.headers["Content-Type"]
+            extension = content_type.split("/")[-1]
+            extension = "svg" if extension == "svg+xml" else extension
+
+            # conversion is CPU bound so run it off the event loop
+            jpeg = await asyncio.to_thread(
+                self._convert_image, r.content, og_name, extension, debug_dir
+            )
 
-        with image_filename.open("rb") as image_file:
+            # upload to medium
             headers = {
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/json",
                 "Accept-Charset": "utf-8",
             }
-            files = {"image": (image_filename.name, image_file, "image/jpeg")}
-            r = httpx.post(f"{self.medium_api}/images", headers=headers, files=files)
-            r.raise_for_status()
+            files = {"image": (f"{og_name}.jpeg", jpeg, "image/jpeg")}
+            with trace.span("upload", bytes=len(jpeg)):
+                r = await transport.post(
+                    f"{self.medium_api}/images", headers=headers, files=files
+                )
+                r.raise_for_status()
 
-        image_filename.unlink()
         image_url = r.json()["data"]["url"]
+        image_cache.put(cache_key, image_str, image_url, image_size)
+        return image_url
+
+    async def _upload_images_to_medium(
+        self,
+        transport: Transport,
+        image_urls: list[str],
+        token: str,
+        concurrency: int,
+        debug_dir: Optional[Path] = None,
+    ) -> list[str]:
+        semaphore = asyncio.Semaphore(concurrency)
+        image_cache = ImageCache(self.sak_cache)
+        try:
+            return await asyncio.gather(
+                *[
+                    self._upload_image_to_medium(
+                        transport, semaphore, image_cache, token, url, debug_dir
+                    )
+                    for url in image_urls
+                ]
+            )
+        finally:
+            image_cache.prune()
+            image_cache.close()
 
-        lines = content.split("\n")
-        for i, line in enumerate(lines):
-            if image_str in line:
-                lines[i] = f'<img src="{image_url}" alt="{alt_text}">'
-        return "\n".join(lines)
+    @property
+    def dry_run_dir(self) -> Path:
+        dry_run_dir = self.sak_cache / "dry-run" / self.name
+        dry_run_dir.mkdir(parents=True, exist_ok=True)
+        return dry_run_dir
 
     def _get_main_image(self, content: str) -> str:
         # Grabs the post's main image because some sites allow this to be uploaded via metadata
-        match = re.search(self.main_image_pattern, content, re.MULTILINE)
+        match = self.main_image_pattern.search(content)
         if not match:
             raise BlogParserError("Cannot find Main Image")
 
-        url_match = re.search(self.url_pattern, match.group(1))
+        url_match = self.url_pattern.search(match.group(1))
         if not url_match:
             raise BlogParserError("Cannot find the URL inside the Main Image line")
 
         return url_match.group(1)
 
-    def _add_title(self, blog: BlogPost) -> BlogPost:
-        # used if the hosting site doesn't want title as metadata. This puts it in the post content.
-        title = f"# {blog.meta.title}\n"
-        blog.content = title + blog.content
-        return blog
-
-    def _note_type_to_emoji(self, note_type: str) -> str:
-        # used when converting admonitions. This swaps out the note type for a relevant emoji.
-        if note_type not in self.note_types:
-            raise BlogParserError(
-                f"Note type '{note_type}' does not have a declared Mapping"
-            )
-        return self.note_types[note_type]
-
-    def _transform_admonitions(self, content):
-        # Replace function to transform matched admonition to new format
-        def replace_admonition(match):
-            note_type = match.group(1)
-            title = match.group(2)
-            body = match.group(3)
-
-            if title is None:
-                title = note_type.title()
-
-            # Indent each line of body and prepend "> "
-            note_emoji = self._note_type_to_emoji(note_type)
-            indented_body = "".join([f"> {line[4:]}" for line in body.splitlines(True)])
-
-            return f"> {note_emoji} **{title}**\n\n{indented_body}"
-
-        # Apply transformation to the content
-        transformed_content = self.admonition_pattern.sub(replace_admonition, content)
-        return transformed_content
-
-    def _remove_includes(self, content: str):
-        lines = content.split("\n")
-        lines = [line for line in lines if "--8<--" not in line]
-        return "\n".join(lines)
-
     def _parse_blog(self, content: str) -> BlogPost:
+        with trace.span("parse", bytes=len(content)):
+            return self._parse(content)
+
+    def _parse(self, content: str) -> BlogPost:
         front_matter_tmp = ""
         blog_content = ""
         lines = content.splitlines()
@@ -205,15 +193,10 @@ class BlogPostParser:
             front_matter_tmp += lines[end_index] + "\n"
             end_index += 1
 
-        # skip the closing delimiter
-        blog_content = "\n".join(lines[end_index + 1 :]).strip()
-        # remove the excerpt marker
-        blog_content = blog_content.replace("<!-- more -->\n", "")
-        # Apply generic transformations
-        blog_content = self._transform_admonitions(blog_content)
-        blog_content = self._replace_headers(blog_content)
-        blog_content = emoji.emojize(blog_content, language="alias")
-        blog_content = self._remove_includes(blog_content)
+        # skip the closing delimiter and apply the generic transformations in one pass
+        blog_content = self.parse_pipeline.run(
+            "\n".join(lines[end_index + 1 :]).strip()
+        )
 
         # turn frontmatter into a dict and add extra metadata
         front_matter = yaml.safe_load(front_matter_tmp)
@@ -226,47 +209,85 @@ class BlogPostParser:
             meta=FrontMatter(**front_matter),
         )
 
-    def send_to_medium(self, canonical_url: str, dry_run: bool = False):
+    async def send_to_medium(
+        self,
+        transport: Transport,
+        canonical_url: str,
+        dry_run: bool = False,
+        image_concurrency: int = DEFAULT_IMAGE_CONCURRENCY,
+        debug_images: bool = False,
+        account_cache: Optional[AccountCache] = None,
+    ):
         token = os.getenv("MEDIUM_API_KEY")
 
         if token is None:
             raise BlogParserError("MEDIUM_API_KEY is not found.")
 
+        account_cache = account_cache or AccountCache(self.sak_cache)
+        try:
+            await self._send_to_medium(
+                transport,
+                token,
+                account_cache,
+                canonical_url,
+                dry_run,
+                image_concurrency,
+                debug_images,
+            )
+        except httpx.HTTPStatusError as e:
+            # the token was revoked or replaced, so the account cached for it can't be trusted
+            rejected = e.response.status_code in (401, 403)
+            if rejected and e.request.url.host == httpx.URL(self.medium_api).host:
+                account_cache.invalidate(token)
+            raise
+
+    async def _send_to_medium(
+        self,
+        transport: Transport,
+        token: str,
+        account_cache: AccountCache,
+        canonical_url: str,
+        dry_run: bool,
+        image_concurrency: int,
+        debug_images: bool,
+    ):
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
-        r = httpx.get(f"{self.medium_api}/me", headers=headers)
-        r.raise_for_status()
-        data = json.loads(r.text)
-        author_id = data["data"]["id"]
-
-        self.medium_blog = self._add_title(self.medium_blog)
 
-        for image in self._find_all_images(self.medium_blog.content):
-            alt_text, url = image
-            self.medium_blog.content = self._upload_image_to_medium(
-                self.medium_blog.content, url, alt_text
-            )
-
-        self.medium_blog.content += (
-            f"\n\n---\n*Originally published on my [blog]({canonical_url})*"
+        async def fetch_account() -> dict:
+            with trace.span("/me"):
+                r = await transport.get(f"{self.medium_api}/me", headers=headers)
+                r.raise_for_status()
+                return r.json()["data"]
+
+        # each distinct image is only uploaded once, alongside the account lookup
+        images = list(find_images(self.post.content))
+        debug_dir = self.sak_cache / "debug-images" if debug_images else None
+        account, uploaded = await asyncio.gather(
+            account_cache.lookup(token, fetch_account),
+            self._upload_images_to_medium(
+                transport, images, token, image_concurrency, debug_dir
+            ),
         )
+        author_id = account["id"]
+        content = render_medium(self.post, canonical_url, dict(zip(images, uploaded)))
 
         payload = {
-            "title": self.medium_blog.meta.title,
+            "title": self.post.meta.title,
             "contentFormat": "markdown",
-            "content": self.medium_blog.content,
+            "content": content,
             "canonicalUrl": canonical_url,
-            "tags": self.medium_blog.meta.tags,
+            "tags": self.post.meta.tags,
             "publishStatus": "draft",
         }
         url = f"{self.medium_api}/users/{author_id}/posts"
 
         if dry_run:
             prefix = "[bold blue][Dry Run Medium][/bold blue]"
-            tmp_filepath = self.sak_cache / "Medium.md"
-            tmp_filepath.write_text(self.medium_blog.content)
+            tmp_filepath = self.dry_run_dir / "Medium.md"
+            tmp_filepath.write_text(content)
             print(f"{prefix} draft written to {tmp_filepath}")
             print(f"{prefix} URL", url)
 
@@ -276,7 +297,7 @@ class BlogPostParser:
 
             return
 
-        r = httpx.post(
+        r = await transport.post(
             url=url,
             headers=headers,
             json=payload,
@@ -284,7 +305,9 @@ class BlogPostParser:
         r.raise_for_status()
         print("Posted to [link=https://medium.com/me/stories/drafts][bold blue]Medium")
 
-    def send_to_dev(self, canonical_url: str, dry_run: bool = False):
+    async def send_to_dev(
+        self, transport: Transport, canonical_url: str, dry_run: bool = False
+    ):
         token = os.getenv("DEV_API_KEY")
 
         if token is None:
@@ -295,29 +318,26 @@ class BlogPostParser:
             "Content-Type": "application/json",
         }
 
-        self.dev_blog.content = re.sub(
-            r"\s+<figcaption>", "\n<figcaption>", self.dev_blog.content
-        )
-        self.dev_blog.content = self._remove_curly_brace_content(self.dev_blog.content)
+        content = render_dev(self.post)
 
         payload = {
             "article": {
-                "title": self.dev_blog.meta.title,
+                "title": self.post.meta.title,
                 "published": "false",
-                "body_markdown": self.dev_blog.content,
-                "tags": self.dev_blog.meta.tags,
-                "description": self.dev_blog.meta.description,
-                "main_image": self.dev_blog.meta.main_image,
+                "body_markdown": content,
+                "tags": self.post.meta.tags,
+                "description": self.post.meta.description,
+                "main_image": self.post.meta.main_image,
                 "canonical_url": canonical_url,
             }
         }
-        if self.dev_blog.meta.series:
-            payload["article"]["series"] = self.dev_blog.meta.series
+        if self.post.meta.series:
+            payload["article"]["series"] = self.post.meta.series
 
         if dry_run:
-            prefix = "[bold green][Dry Run Medium][/bold green]"
-            tmp_filepath = self.sak_cache / "Dev.to.md"
-            tmp_filepath.write_text(self.dev_blog.content)
+            prefix = "[bold green][Dry Run Dev.to][/bold green]"
+            tmp_filepath = self.dry_run_dir / "Dev.to.md"
+            tmp_filepath.write_text(content)
             print(f"{prefix} draft written to {tmp_filepath}")
             print(f"{prefix} URL", self.dev_api)
 
@@ -327,7 +347,7 @@ class BlogPostParser:
 
             return
 
-        r = httpx.post(
+        r = await transport.post(
             url=self.dev_api,
             headers=headers,
             json=payload,
@@ -338,9 +358,18 @@ class BlogPostParser:
 
 
 if __name__ == "__main__":
-    dry = True
-    dir = os.path.dirname(os.path.realpath(__file__))
-    with open(f"{dir}/../dummy.md") as f:
-        parser = BlogPostParser(f.read())
-        parser.send_to_medium("https://www.theselftaughtdev.io", dry_run=dry)
-        parser.send_to_dev("https://www.theselftaughtdev.io", dry_run=dry)
+
+    async def main():
+        dry = True
+        dir = os.path.dirname(os.path.realpath(__file__))
+        with open(f"{dir}/../dummy.md") as f:
+            parser = BlogPostParser(f.read(), name="dummy")
+        async with Transport() as transport:
+            await parser.send_to_medium(
+                transport, "https://www.theselftaughtdev.io", dry_run=dry
+            )
+            await parser.send_to_dev(
+                transport, "https://www.theselftaughtdev.io", dry_run=dry
+            )
+
+    asyncio.run(main())
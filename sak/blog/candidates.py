@@ -0,0 +1,160 @@
+"""
+Interactive choice between generated candidates (titles, descriptions, excerpts).
+
+While the user reads the candidates, the next batch is already being generated on a
+background event loop, so asking to regenerate shows new ones almost straight away.
+Whatever is still in flight is cancelled as soon as a choice is made, and a batch that
+failed is only reported if the user asks for it.
+"""
+
+import asyncio
+import threading
+import typer
+from concurrent.futures import Future
+from typing import Callable, Optional
+from pydantic import BaseModel
+from rich import print
+from ..utils import Helpers, ledger
+from ..utils.helpers import Usage
+
+REGENERATE = "r"
+
+# batches that break every rule are regenerated straight away, but only so many in a row
+MAX_AUTOMATIC_REGENERATIONS = 3
+
+
+class BackgroundLoop:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def close(self):
+        # cancelling aborts any request in flight, waiting lets its connection close cleanly
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.submit(cancel_all()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def more_messages(messages: list[dict], seen: list[str]) -> list[dict]:
+    # asked last, so the article and instructions still form a cacheable prefix
+    listed = "\n".join(f"- {candidate}" for candidate in seen)
+    return messages + [
+        {
+            "role": "user",
+            "content": f"None of these are right. Give new options that are different from:\n{listed}",
+        }
+    ]
+
+
+def select_candidate(
+    kind: str,
+    candidates: list[str],
+    messages: list[dict],
+    response_format: type[BaseModel],
+    field: str,
+    show: Callable[[BaseModel], None],
+    model: str,
+    length: Optional[tuple[int, int]] = None,
+) -> str:
+    """
+    Show `candidates` and return the one the user picks, regenerating as often as they
+    like. `length` is the (min, max) characters a candidate must have to be shown.
+    """
+
+    def fits(candidate: str) -> bool:
+        return length is None or length[0] <= len(candidate) <= length[1]
+
+    # the background loop has its own thread, so its calls are told which post they're for
+    post = ledger.current_post.get()
+
+    async def generate(seen: list[str]) -> tuple[list[str], list[Usage]]:
+        from openai import AsyncOpenAI
+
+        ledger.current_post.set(post)
+        usages: list[Usage] = []
+        async with AsyncOpenAI() as client:
+            response = await Helpers.query_gpt_async(
+                client,
+                model=model,
+                messages=more_messages(messages, seen),
+                response_format=response_format,
+                # a batch that was turned down is never worth replaying
+                use_cache=False,
+                on_usage=usages.append,
+                raise_errors=True,
+            )
+        return getattr(response, field), usages
+
+    seen = list(candidates)
+    shown = [candidate for candidate in candidates if fits(candidate)]
+    automatic = 0
+
+    background = BackgroundLoop()
+    pending = background.submit(generate(list(seen)))
+    try:
+        while True:
+            if length is not None and len(shown) < len(candidates):
+                print(
+                    f"[yellow]Left out {len(candidates) - len(shown)} {kind}(s) not between "
+                    f"{length[0]} and {length[1]} characters.[/]"
+                )
+
+            if shown:
+                automatic = 0
+                show(response_format.model_validate({field: shown}))
+                choice = prompt_choice(
+                    f"Which {kind} would you like to copy?", len(shown), regenerate=True
+                )
+            elif automatic < MAX_AUTOMATIC_REGENERATIONS:
+                automatic += 1
+                choice = REGENERATE
+            else:
+                print(f"[bold red]Error: no {kind} kept to the length rules.")
+                raise typer.Exit(code=1)
+
+            if choice != REGENERATE:
+                Helpers.isNoneSelection(choice)
+                return shown[choice - 1]
+
+            with Helpers.get_spinner(f"Regenerating {kind}s...") as progress:
+                progress.add_task("")
+                try:
+                    candidates, usages = pending.result()
+                except Exception as e:
+                    print(e)
+                    raise typer.Exit(code=1)
+            for usage in usages:
+                Helpers.show_usage(usage)
+
+            seen += candidates
+            shown = [candidate for candidate in candidates if fits(candidate)]
+            pending = background.submit(generate(list(seen)))
+    finally:
+        # the user has chosen, so whatever is still being generated isn't needed
+        background.close()
+
+
+def prompt_choice(question: str, count: int, regenerate: bool = False) -> int | str:
+    """Ask until the answer is a number from 0 (none) to `count`, or REGENERATE if allowed."""
+    hint = f"'{Helpers.none_selection}' for None"
+    if regenerate:
+        hint += f", '{REGENERATE}' to regenerate"
+    while True:
+        choice = typer.prompt(f"{question} ({hint})").strip().lower()
+        if regenerate and choice == REGENERATE:
+            return choice
+        if choice.isdigit() and 0 <= int(choice) <= count:
+            return int(choice)
+        extra = f", or '{REGENERATE}'" if regenerate else ""
+        print(f"[red]Choose a number from 0 to {count}{extra}.[/]")
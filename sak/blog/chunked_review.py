@@ -0,0 +1,148 @@
+"""
+Reviews a long post as several chunks at once. The post is split at its `##` headings,
+sections are packed into chunks that fit a token budget, and the chunk reviews are merged
+into a single report, so the wait is about as long as the slowest chunk.
+"""
+
+import asyncio
+import typer
+from typing import NamedTuple
+from rich import print
+from ..utils import Helpers
+from ..utils.helpers import Usage
+from .prompts import article_messages
+from .reducer import estimate_tokens
+from .review import POST_REVIEWER_CONTENT, ReviewResponse, merge_reviews
+from .sections import split_sections
+from .transforms import split_paragraphs
+
+CHUNK_REVIEWER_CONTENT = (
+    POST_REVIEWER_CONTENT
+    + """
+This is part {part} of {parts} of the article "{title}". Only review this part, the rest is reviewed separately.
+"""
+)
+
+
+class Chunk(NamedTuple):
+    # headings of the first and last sections in the chunk, for labelling comments
+    label: str
+    content: str
+    tokens: int
+
+
+def split_chunks(content: str, max_tokens: int, model: str) -> list[Chunk]:
+    """
+    Pack consecutive `##` sections into chunks of at most `max_tokens`. A section that is
+    too big on its own is split between paragraphs instead.
+    """
+    pieces: list[tuple[str, str]] = []
+    for section in split_sections(content):
+        heading = section.heading or "Introduction"
+        if estimate_tokens(section.content, model) <= max_tokens:
+            pieces.append((heading, section.content))
+        else:
+            pieces.extend(
+                (heading, paragraph) for paragraph in split_paragraphs(section.content)
+            )
+
+    chunks: list[Chunk] = []
+    headings: list[str] = []
+    parts: list[str] = []
+    tokens = 0
+    for heading, piece in pieces:
+        piece_tokens = estimate_tokens(piece + "\n\n", model)
+        if parts and tokens + piece_tokens > max_tokens:
+            chunks.append(_chunk(headings, parts, tokens))
+            headings, parts, tokens = [], [], 0
+        if heading not in headings:
+            headings.append(heading)
+        parts.append(piece)
+        tokens += piece_tokens
+    if parts:
+        chunks.append(_chunk(headings, parts, tokens))
+    return chunks
+
+
+def _chunk(headings: list[str], parts: list[str], tokens: int) -> Chunk:
+    label = headings[0] if len(headings) == 1 else f"{headings[0]} – {headings[-1]}"
+    return Chunk(label, "\n\n".join(parts), tokens)
+
+
+async def _review_chunks(
+    chunks: list[Chunk],
+    title: str,
+    model: str,
+    concurrency: int,
+    use_cache: bool,
+    refresh: bool,
+    usages: list[Usage],
+) -> list[ReviewResponse]:
+    from openai import AsyncOpenAI
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def review(client: AsyncOpenAI, part: int, chunk: Chunk) -> ReviewResponse:
+        instructions = CHUNK_REVIEWER_CONTENT.format(
+            part=part, parts=len(chunks), title=title
+        )
+        async with semaphore:
+            return await Helpers.query_gpt_async(
+                client,
+                model=model,
+                messages=article_messages(chunk.content, instructions),
+                response_format=ReviewResponse,
+                use_cache=use_cache,
+                refresh=refresh,
+                on_usage=usages.append,
+            )
+
+    # one client so every chunk shares the same connection pool
+    async with AsyncOpenAI() as client:
+        return await asyncio.gather(
+            *[review(client, part, chunk) for part, chunk in enumerate(chunks, start=1)]
+        )
+
+
+def review_chunked(
+    content: str,
+    title: str,
+    model: str,
+    max_tokens: int,
+    concurrency: int,
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> ReviewResponse:
+    chunks = split_chunks(content, max_tokens, model)
+    if not chunks:
+        print("[bold red]Error: there is nothing in the post to review.")
+        raise typer.Exit(code=1)
+
+    print(
+        f"[yellow]Chunks:[/] {len(chunks)} "
+        f"(largest ~{max(chunk.tokens for chunk in chunks)} tokens)"
+    )
+
+    usages: list[Usage] = []
+    with Helpers.get_spinner(f"Reviewing {len(chunks)} chunks...") as progress:
+        progress.add_task("")
+        try:
+            reviews = asyncio.run(
+                _review_chunks(
+                    chunks, title, model, concurrency, use_cache, refresh, usages
+                )
+            )
+        except typer.Exit:
+            raise
+        except Exception as e:
+            print(e)
+            raise typer.Exit(code=1)
+
+    Helpers.show_usage(Helpers.combine_usage(usages))
+
+    return merge_reviews(
+        [
+            (chunk.label, review, chunk.tokens)
+            for chunk, review in zip(chunks, reviews)
+        ]
+    )
@@ -1,21 +1,37 @@
 import typer
 from rich import print
-import pyperclip
-from ..utils import DEFAULT_AI_MODEL, Annotations, Helpers
+from ..utils import DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS, Annotations, Helpers
+from .candidates import select_candidate
+from .prompts import article_messages
+from .reducer import prepare_article
 from pydantic import BaseModel
 
 
 class DescriptionResponse(BaseModel):
     descriptions: list[str]
 
+
+# the same limits the prompt asks for, anything else is left out
+DESCRIPTION_LENGTH = (140, 156)
+
 DESCRIPTION_GENERATOR_CONTENT = """
-You are a skilled, concise summariser specialising in technical blog posts and SEO. Articles provided within triple backticks are in markdown format (for 'Material for MKDocs') and may include front matter you can ignore.
+You are a skilled, concise summariser specialising in technical blog posts and SEO.
 
 Your task is to create **three distinct one-line summaries** that will pique the reader's curiosity and entice them to read the full article. Use UK spelling and grammar.
 
 Your descriptions MUST be between 140-156 characters long.
 """
 
+
+def describe_messages(user_content: str) -> list[dict]:
+    return article_messages(user_content, DESCRIPTION_GENERATOR_CONTENT)
+
+
+def print_descriptions(response: DescriptionResponse):
+    for i, description in enumerate(response.descriptions, start=1):
+        print(f"[bold underline sky_blue1]Description {i}[/]\n{description}\n")
+
+
 app = typer.Typer()
 
 
@@ -23,37 +39,42 @@ app = typer.Typer()
 def describe(
     filepath: Annotations.filepath,
     model: Annotations.model = DEFAULT_AI_MODEL,
+    no_cache: Annotations.no_cache = False,
+    refresh: Annotations.refresh = False,
+    max_input_tokens: Annotations.max_input_tokens = DEFAULT_MAX_INPUT_TOKENS,
 ):
     """
     Send a blog post to ChatGPT to generate a one-line description. The result is copied to your clipboard.
     """
+    import pyperclip
+
     Helpers.check_file_exists(filepath)
     Helpers.validate_model(model)
 
-    user_content = filepath.read_text()
+    user_content = prepare_article(
+        filepath.read_text(), "summary", model, max_input_tokens
+    )
 
     with Helpers.get_spinner("Getting descriptions...") as progress:
         progress.add_task("")
         response = Helpers.query_gpt(
             model=model,
-            messages=[
-                {"role": "system", "content": DESCRIPTION_GENERATOR_CONTENT},
-                {
-                    "role": "user",
-                    "content": f"Summarise this article: ```{user_content}```",
-                },
-            ],
+            messages=describe_messages(user_content),
             response_format=DescriptionResponse,
+            use_cache=not no_cache,
+            refresh=refresh,
         )
 
-    for i, description in enumerate(response.descriptions, start=1):
-        print(f"[bold underline sky_blue1]Description {i}[/]\n{description}\n")
-
-    selection = int(
-        typer.prompt(
-            f"Which description would you like to copy? ('{Helpers.none_selection}' for None)"
-        )
+    choice = select_candidate(
+        "description",
+        response.descriptions,
+        describe_messages(user_content),
+        DescriptionResponse,
+        "descriptions",
+        print_descriptions,
+        model,
+        length=DESCRIPTION_LENGTH,
     )
 
-    pyperclip.copy(response.descriptions[selection - 1])
+    pyperclip.copy(choice)
     print("[green]Copied to clipboard![/]")
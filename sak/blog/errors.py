@@ -0,0 +1,2 @@
+class BlogParserError(Exception):
+    pass
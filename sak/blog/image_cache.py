@@ -0,0 +1,121 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+DEFAULT_MAX_AGE_DAYS = 180
+DEFAULT_MAX_ENTRIES = 5_000
+# total size of the source images the entries stand for
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+class ImageCacheStats(NamedTuple):
+    entries: int
+    source_bytes: int
+    disk_bytes: int
+    oldest: Optional[float]
+    newest: Optional[float]
+
+
+class ImageCache:
+    """
+    Maps a source image to the URL Medium gave it when it was uploaded.
+    Entries are keyed by the source URL plus a hash of the downloaded bytes, so an image
+    that changes behind the same URL gets uploaded again.
+    """
+
+    filename = "medium_images.db"
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / self.filename
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS medium_images (
+                key TEXT PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                medium_url TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+
+    @staticmethod
+    def key(source_url: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        return hashlib.sha256(f"{source_url}\0{digest}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT medium_url FROM medium_images WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE medium_images SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return row[0]
+
+    def put(self, key: str, source_url: str, medium_url: str, size: int):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO medium_images VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source_url, medium_url, size, now, now),
+            )
+
+    def stats(self) -> ImageCacheStats:
+        entries, source_bytes, oldest, newest = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(last_used), MAX(last_used) FROM medium_images"
+        ).fetchone()
+        return ImageCacheStats(
+            entries=entries,
+            source_bytes=source_bytes,
+            disk_bytes=self.path.stat().st_size,
+            oldest=oldest,
+            newest=newest,
+        )
+
+    def prune(
+        self,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> int:
+        # drop anything not used recently, then the least recently used beyond either bound
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        with self.conn:
+            removed = self.conn.execute(
+                "DELETE FROM medium_images WHERE last_used < ?", (cutoff,)
+            ).rowcount
+            removed += self.conn.execute(
+                """
+                DELETE FROM medium_images WHERE key IN (
+                    SELECT key FROM (
+                        SELECT
+                            key,
+                            ROW_NUMBER() OVER (ORDER BY last_used DESC) AS position,
+                            SUM(size) OVER (ORDER BY last_used DESC) AS running_size
+                        FROM medium_images
+                    )
+                    WHERE position > ? OR running_size > ?
+                )
+                """,
+                (max_entries, max_bytes),
+            ).rowcount
+        return removed
+
+    def clear(self) -> int:
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM medium_images").rowcount
+        self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,219 @@
+import typer
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from typing_extensions import Annotated
+from rich import print
+from ..utils import CACHE_DIR
+
+app = typer.Typer(
+    no_args_is_help=True,
+    help="Index the front matter of your posts and query it without parsing them.",
+)
+
+Drafts = Annotated[
+    Optional[bool],
+    typer.Option("--drafts/--published", help="Only drafts, or only published posts."),
+]
+
+
+def _open():
+    from .post_index import PostIndex
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return PostIndex(CACHE_DIR)
+
+
+def _display_path(path: str) -> str:
+    try:
+        return str(Path(path).relative_to(Path.cwd()))
+    except ValueError:
+        return path
+
+
+def _print_empty(index, what: str):
+    if index.entries():
+        print(f"[yellow]No matching {what}.")
+    else:
+        print("[yellow]The index is empty.[/] Run `sak blog index update <posts>` first.")
+
+
+def _print_posts(index, posts: list, title: str):
+    from rich.table import Table
+
+    if not posts:
+        _print_empty(index, "posts")
+        return
+
+    table = Table(title=f"{title} ({len(posts)})")
+    for column in ["Date", "Title", "Series", "Draft", "Path"]:
+        table.add_column(column)
+    for post in posts:
+        table.add_row(
+            post.date[:10],
+            post.title,
+            post.series or "",
+            "[yellow]yes[/]" if post.draft else "",
+            _display_path(post.path),
+        )
+    print(table)
+
+
+def _print_counts(index, counts: list, field: str):
+    from rich.table import Table
+
+    if not counts:
+        _print_empty(index, field)
+        return
+
+    table = Table(title=field.title())
+    table.add_column(field.title())
+    for column in ["Posts", "Drafts"]:
+        table.add_column(column, justify="right")
+    for name, posts, drafts in counts:
+        table.add_row(name, str(posts), str(drafts) if drafts else "")
+    print(table)
+
+
+@app.command()
+def update(
+    pattern: Annotated[
+        str, typer.Argument(help="A post, a directory of posts or a glob pattern.")
+    ],
+):
+    """
+    Add new and changed posts to the index and drop deleted ones. Unchanged files aren't read.
+    """
+    import time
+    from ..utils import Helpers
+
+    posts = Helpers.find_posts(pattern)
+    index = _open()
+    try:
+        start = time.perf_counter()
+        result = index.update(posts)
+        elapsed = time.perf_counter() - start
+        entries = index.entries()
+    finally:
+        index.close()
+
+    style = "sky_blue1"
+    print(
+        f"[{style}]Indexed {len(posts)} post(s) in {elapsed:.2f}s:[/] "
+        f"{result.added} added, {result.updated} updated, {result.unchanged} unchanged, "
+        f"{result.removed} removed ({entries} in the index)"
+    )
+    for path, error in result.errors:
+        print(f"[red]{_display_path(path)}:[/] {error}")
+
+
+@app.command()
+def tags(
+    tag: Annotated[Optional[str], typer.Argument(help="List the posts with this tag.")] = None,
+    drafts: Drafts = None,
+):
+    """
+    List every tag with its number of posts, or the posts with a given tag.
+    """
+    index = _open()
+    try:
+        if tag is None:
+            _print_counts(index, index.counts("tag"), "tags")
+        else:
+            _print_posts(index, index.posts(tag=tag, draft=drafts), f"Tagged {tag}")
+    finally:
+        index.close()
+
+
+@app.command()
+def categories(
+    category: Annotated[
+        Optional[str], typer.Argument(help="List the posts in this category.")
+    ] = None,
+    drafts: Drafts = None,
+):
+    """
+    List every category with its number of posts, or the posts in a given category.
+    """
+    index = _open()
+    try:
+        if category is None:
+            _print_counts(index, index.counts("category"), "categories")
+        else:
+            posts = index.posts(category=category, draft=drafts)
+            _print_posts(index, posts, f"In {category}")
+    finally:
+        index.close()
+
+
+@app.command()
+def series(
+    name: Annotated[Optional[str], typer.Argument(help="List the posts in this series.")] = None,
+    drafts: Drafts = None,
+):
+    """
+    List every series with its number of posts, or the posts of a series in order.
+    """
+    index = _open()
+    try:
+        if name is None:
+            _print_counts(index, index.counts("series"), "series")
+        else:
+            _print_posts(index, index.posts(series=name, draft=drafts), f"Series {name}")
+    finally:
+        index.close()
+
+
+@app.command()
+def drafts():
+    """
+    List the posts that are still drafts.
+    """
+    index = _open()
+    try:
+        _print_posts(index, index.posts(draft=True), "Drafts")
+    finally:
+        index.close()
+
+
+@app.command()
+def dates(
+    since: Annotated[
+        Optional[datetime],
+        typer.Option(formats=["%Y-%m-%d"], help="First day to include, e.g. 2024-01-31."),
+    ] = None,
+    until: Annotated[
+        Optional[datetime],
+        typer.Option(formats=["%Y-%m-%d"], help="Last day to include, e.g. 2024-12-31."),
+    ] = None,
+    drafts: Drafts = None,
+):
+    """
+    List the posts created between two days, both included.
+    """
+    if since and until and since > until:
+        print("[bold red]Error: --since is after --until.")
+        raise typer.Exit(code=1)
+
+    index = _open()
+    try:
+        _print_posts(index, index.posts(draft=drafts, since=since, until=until), "Posts")
+    finally:
+        index.close()
+
+
+@app.command()
+def errors():
+    """
+    List the posts whose front matter couldn't be indexed, and why.
+    """
+    index = _open()
+    try:
+        posts = index.posts(errors=True)
+    finally:
+        index.close()
+
+    for post in posts:
+        print(f"[red]{_display_path(post.path)}:[/] {post.error}")
+    if not posts:
+        print("[green]Every indexed post has valid front matter.")
@@ -1,7 +1,9 @@
 import typer
 from rich import print
-import pyperclip
-from ..utils import DEFAULT_AI_MODEL, Annotations, Helpers
+from ..utils import DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS, Annotations, Helpers
+from .candidates import select_candidate
+from .prompts import article_messages
+from .reducer import prepare_article
 from pydantic import BaseModel
 
 
@@ -9,7 +11,7 @@ class IntroResponse(BaseModel):
     excerpts: list[str]
 
 EXCERPT_GENERATOR_CONTENT = """
-You are a skilled content summariser specialising in technical blog posts. Articles provided within triple backticks are in markdown format (for 'Material for MKDocs') and may include front matter you can ignore.
+You are a skilled content summariser specialising in technical blog posts.
 
 Your task is to craft **three distinct one-paragraph excerpts** that effectively introduce the article's main ideas, setting the stage for readers and sparking their interest to continue reading.
 Be concise and casual.
@@ -18,6 +20,16 @@ Do not refer to the title of the article.
 Use UK spelling and grammar.
 """
 
+
+def introduce_messages(user_content: str) -> list[dict]:
+    return article_messages(user_content, EXCERPT_GENERATOR_CONTENT)
+
+
+def print_excerpts(response: IntroResponse):
+    for i, excerpt in enumerate(response.excerpts, start=1):
+        print(f"[bold underline dark_orange]Excerpt {i}[/]\n{excerpt}\n")
+
+
 app = typer.Typer()
 
 
@@ -25,39 +37,41 @@ app = typer.Typer()
 def introduce(
     filepath: Annotations.filepath,
     model: Annotations.model = DEFAULT_AI_MODEL,
+    no_cache: Annotations.no_cache = False,
+    refresh: Annotations.refresh = False,
+    max_input_tokens: Annotations.max_input_tokens = DEFAULT_MAX_INPUT_TOKENS,
 ):
     """
     Send a blog post to ChatGPT to generate an introduction.
     """
+    import pyperclip
+
     Helpers.check_file_exists(filepath)
     Helpers.validate_model(model)
 
-    user_content = filepath.read_text()
+    user_content = prepare_article(
+        filepath.read_text(), "summary", model, max_input_tokens
+    )
 
     with Helpers.get_spinner("Preparing introductions...") as progress:
         progress.add_task("")
         response = Helpers.query_gpt(
             model=model,
-            messages=[
-                {"role": "system", "content": EXCERPT_GENERATOR_CONTENT},
-                {
-                    "role": "user",
-                    "content": f"Introduce this article: ```{user_content}```",
-                },
-            ],
+            messages=introduce_messages(user_content),
             response_format=IntroResponse,
+            use_cache=not no_cache,
+            refresh=refresh,
         )
 
-    for i, excerpt in enumerate(response.excerpts, start=1):
-        print(f"[bold underline dark_orange]Excerpt {i}[/]\n{excerpt}\n")
-
-    selection = int(
-        typer.prompt(
-            f"Which except would you like to copy? ('{Helpers.none_selection}' for None)"
-        )
+    choice = select_candidate(
+        "excerpt",
+        response.excerpts,
+        introduce_messages(user_content),
+        IntroResponse,
+        "excerpts",
+        print_excerpts,
+        model,
     )
 
-    Helpers.isNoneSelection(selection)
-
-    pyperclip.copy(response.excerpts[selection - 1])
+    pyperclip.copy(choice)
     print("[green]Copied to clipboard![/]")
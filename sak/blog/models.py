@@ -0,0 +1,30 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Optional
+
+
+class PostFrontMatter(BaseModel):
+    # what a post's own --- block holds, enough to index it without reading the body
+    model_config = ConfigDict(frozen=True)
+
+    draft: bool
+    authors: list[str]
+    date: datetime
+    categories: list[str]
+    tags: list[str]
+    description: str
+    title: str
+    series: Optional[str] = None
+
+
+class FrontMatter(PostFrontMatter):
+    # the main image is taken from the body when the post is parsed
+    main_image: str
+
+
+class BlogPost(BaseModel):
+    # frozen so a parsed post can be rendered for several platforms without copying it
+    model_config = ConfigDict(frozen=True)
+
+    content: str
+    meta: FrontMatter
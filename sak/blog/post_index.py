@@ -0,0 +1,319 @@
+"""
+A SQLite index of every post's front matter, for questions like "which posts are still
+drafts" or "everything tagged python" without parsing the posts.
+
+Only the leading --- block of each file is read. Files whose size and modification time
+haven't changed are skipped, and a file that was only touched keeps its entry as long as
+its front matter hashes the same. Every entry is stamped with the version of the front
+matter model it was checked against, and checked again once that changes.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# how much of a file is read at a time while looking for the end of its front matter
+CHUNK_SIZE = 4096
+# front matter is a few hundred bytes, anything past this isn't front matter
+MAX_FRONT_MATTER_BYTES = 1024 * 1024
+
+# bump when PostFrontMatter's validation changes without its schema changing
+INDEX_VERSION = 1
+
+_OPENING = re.compile(rb"---\r?\n")
+_CLOSING = re.compile(rb"^---\r?$", re.MULTILINE)
+
+
+class PostIndexError(Exception):
+    pass
+
+
+class IndexedPost(NamedTuple):
+    path: str
+    title: Optional[str]
+    date: Optional[str]
+    draft: Optional[bool]
+    series: Optional[str]
+    error: Optional[str]
+
+
+class IndexUpdate(NamedTuple):
+    added: int
+    updated: int
+    unchanged: int
+    removed: int
+    # (path, error) of the posts whose front matter couldn't be indexed
+    errors: list[tuple[str, str]]
+
+
+def read_front_matter_block(path: Path) -> bytes:
+    """The raw text between a file's opening and closing --- lines."""
+    with open(path, "rb") as f:
+        data = f.read(CHUNK_SIZE)
+        opening = _OPENING.match(data)
+        if opening is None:
+            raise PostIndexError("No frontmatter detected!")
+
+        searched = opening.end()
+        at_end = len(data) < CHUNK_SIZE
+        while True:
+            closing = _CLOSING.search(data, searched)
+            # a --- right at the end of what's been read may go on in the next chunk
+            if closing is not None and (at_end or closing.end() < len(data)):
+                return data[opening.end() : closing.start()]
+            if at_end or len(data) >= MAX_FRONT_MATTER_BYTES:
+                raise PostIndexError("The frontmatter is never closed")
+
+            # only the last, unfinished line needs searching again
+            searched = max(opening.end(), data.rfind(b"\n") + 1)
+            more = f.read(CHUNK_SIZE)
+            at_end = not more
+            data += more
+
+
+def load_front_matter(block: bytes):
+    """Validate a front matter block the way the parser reads it, bar the main image."""
+    import yaml
+    from pydantic import ValidationError
+    from .models import PostFrontMatter
+
+    # libyaml's loader when PyYAML was built with it, it's several times faster
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        front_matter = yaml.load(block, Loader=loader)
+    except yaml.YAMLError as e:
+        raise PostIndexError(f"Invalid YAML: {e}") from e
+    if not isinstance(front_matter, dict):
+        raise PostIndexError("The frontmatter isn't a mapping")
+
+    if isinstance(front_matter.get("date"), dict):
+        front_matter["date"] = front_matter["date"].get("created")
+    try:
+        return PostFrontMatter(**front_matter)
+    except ValidationError as e:
+        problems = [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ]
+        raise PostIndexError("; ".join(problems)) from e
+
+
+def schema_stamp() -> str:
+    """What an entry was validated against: the index version and the model's schema."""
+    import json
+    from .models import PostFrontMatter
+
+    schema = json.dumps(PostFrontMatter.model_json_schema(), sort_keys=True)
+    return f"{INDEX_VERSION}:{hashlib.sha256(schema.encode()).hexdigest()[:16]}"
+
+
+class PostIndex:
+    filename = "post_index.db"
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / self.filename
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(
+            """
+            PRAGMA foreign_keys = ON;
+            CREATE TABLE IF NOT EXISTS posts (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                title TEXT,
+                description TEXT,
+                date TEXT,
+                draft INTEGER,
+                series TEXT,
+                error TEXT,
+                schema TEXT
+            );
+            CREATE TABLE IF NOT EXISTS post_tags (
+                path TEXT NOT NULL REFERENCES posts (path) ON DELETE CASCADE,
+                tag TEXT NOT NULL COLLATE NOCASE
+            );
+            CREATE TABLE IF NOT EXISTS post_categories (
+                path TEXT NOT NULL REFERENCES posts (path) ON DELETE CASCADE,
+                category TEXT NOT NULL COLLATE NOCASE
+            );
+            CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+            CREATE INDEX IF NOT EXISTS posts_series ON posts (series);
+            CREATE INDEX IF NOT EXISTS post_tags_tag ON post_tags (tag);
+            CREATE INDEX IF NOT EXISTS post_tags_path ON post_tags (path);
+            CREATE INDEX IF NOT EXISTS post_categories_category ON post_categories (category);
+            CREATE INDEX IF NOT EXISTS post_categories_path ON post_categories (path);
+            """
+        )
+        # indexes from before entries were stamped, all of them get checked again
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(posts)")]
+        if "schema" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE posts ADD COLUMN schema TEXT")
+
+    def update(self, posts: list[Path]) -> IndexUpdate:
+        """Bring the index up to date with `posts`, and forget posts that were deleted."""
+        stamp = schema_stamp()
+        known = {
+            path: (mtime, size, digest, schema)
+            for path, mtime, size, digest, schema in self.conn.execute(
+                "SELECT path, mtime, size, hash, schema FROM posts"
+            )
+        }
+        added = updated = unchanged = 0
+        seen = set()
+
+        with self.conn:
+            for post in posts:
+                path = str(post.resolve())
+                if path in seen:
+                    continue
+                seen.add(path)
+
+                stat = post.stat()
+                entry = known.get(path)
+                current = entry is not None and entry[3] == stamp
+                if current and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                    unchanged += 1
+                    continue
+
+                try:
+                    block = read_front_matter_block(post)
+                except PostIndexError as e:
+                    block, error = b"", str(e)
+                else:
+                    error = None
+                digest = hashlib.sha256(block).hexdigest()
+
+                if current and error is None and entry[2] == digest:
+                    # touched, or only the body changed
+                    self.conn.execute(
+                        "UPDATE posts SET mtime = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, path),
+                    )
+                    unchanged += 1
+                    continue
+
+                meta = None
+                if error is None:
+                    try:
+                        meta = load_front_matter(block)
+                    except PostIndexError as e:
+                        error = str(e)
+
+                self.conn.execute("DELETE FROM posts WHERE path = ?", (path,))
+                self.conn.execute(
+                    "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        path,
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        digest,
+                        meta.title if meta else None,
+                        meta.description if meta else None,
+                        meta.date.isoformat() if meta else None,
+                        meta.draft if meta else None,
+                        meta.series if meta else None,
+                        error,
+                        stamp,
+                    ),
+                )
+                if meta is not None:
+                    self.conn.executemany(
+                        "INSERT INTO post_tags VALUES (?, ?)",
+                        [(path, tag) for tag in dict.fromkeys(meta.tags)],
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO post_categories VALUES (?, ?)",
+                        [(path, category) for category in dict.fromkeys(meta.categories)],
+                    )
+
+                if entry is None:
+                    added += 1
+                else:
+                    updated += 1
+
+            # posts that moved or were deleted, posts indexed from elsewhere are kept
+            gone = [(path,) for path in known if path not in seen and not os.path.exists(path)]
+            self.conn.executemany("DELETE FROM posts WHERE path = ?", gone)
+
+        errors = self.conn.execute(
+            "SELECT path, error FROM posts WHERE error IS NOT NULL ORDER BY path"
+        ).fetchall()
+        return IndexUpdate(added, updated, unchanged, len(gone), errors)
+
+    def posts(
+        self,
+        tag: Optional[str] = None,
+        category: Optional[str] = None,
+        series: Optional[str] = None,
+        draft: Optional[bool] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        errors: bool = False,
+    ) -> list[IndexedPost]:
+        """Indexed posts matching every filter given, oldest first."""
+        clauses = ["error IS NOT NULL" if errors else "error IS NULL"]
+        params: list = []
+        if tag is not None:
+            clauses.append("path IN (SELECT path FROM post_tags WHERE tag = ?)")
+            params.append(tag)
+        if category is not None:
+            clauses.append("path IN (SELECT path FROM post_categories WHERE category = ?)")
+            params.append(category)
+        if series is not None:
+            clauses.append("series = ? COLLATE NOCASE")
+            params.append(series)
+        if draft is not None:
+            clauses.append("draft = ?")
+            params.append(draft)
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            # the whole of the last day is included
+            clauses.append("date < ?")
+            params.append((until + timedelta(days=1)).isoformat())
+
+        rows = self.conn.execute(
+            f"""
+            SELECT path, title, date, draft, series, error FROM posts
+            WHERE {' AND '.join(clauses)} ORDER BY date, path
+            """,
+            params,
+        )
+        return [
+            IndexedPost(path, title, date, None if draft is None else bool(draft), name, error)
+            for path, title, date, draft, name, error in rows
+        ]
+
+    def counts(self, field: str) -> list[tuple[str, int, int]]:
+        """(name, posts, drafts) for every tag, category or series in the index."""
+        source = {
+            "tag": "post_tags JOIN posts USING (path)",
+            "category": "post_categories JOIN posts USING (path)",
+            "series": "posts",
+        }[field]
+        return self.conn.execute(
+            f"""
+            SELECT {field}, COUNT(*), SUM(draft) FROM {source}
+            WHERE {field} IS NOT NULL AND error IS NULL
+            GROUP BY {field} COLLATE NOCASE ORDER BY {field} COLLATE NOCASE
+            """
+        ).fetchall()
+
+    def entries(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def clear(self) -> int:
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM posts").rowcount
+        self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.conn.close()
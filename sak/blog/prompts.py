@@ -0,0 +1,15 @@
+ARTICLE_CONTEXT = """
+You help a technical blogger prepare their posts for publishing.
+The article you are asked about is provided within triple backticks. It is in markdown format (for 'Material for MKDocs'). Long code blocks, and the end of a very long article, may have been cut to save space.
+"""
+
+
+def article_messages(article: str, instructions: str) -> list[dict]:
+    # The article goes before the command's own instructions. Every command then sends the
+    # same opening messages for a post, which the provider caches and bills at a lower rate
+    # when review, describe, title and introduce (or analyze) run on it one after another.
+    return [
+        {"role": "system", "content": ARTICLE_CONTEXT},
+        {"role": "user", "content": f"```{article}```"},
+        {"role": "system", "content": instructions},
+    ]
@@ -1,20 +1,56 @@
 import typer
 from typing_extensions import Annotated
 from rich import print
-import validators
-from .blog_parser import BlogPostParser
-from ..utils import Annotations, Helpers
+from ..utils import (
+    DEFAULT_IMAGE_CONCURRENCY,
+    DEFAULT_PUBLISH_CONCURRENCY,
+    Helpers,
+)
 
 DEFAULT_URL = "http://default.com"
 
 app = typer.Typer()
 
 
+def _summary_table(names: dict, platforms: list[str], results: list):
+    from rich.markup import escape
+    from rich.table import Table
+
+    # keyed by source file, so two posts can never share a row
+    outcomes = {path: {} for path in names}
+    for result in results:
+        outcomes[result.path][result.platform] = result.error
+
+    table = Table(title="Publish summary")
+    table.add_column("Post")
+    for platform in platforms:
+        table.add_column(platform)
+
+    for path, errors in outcomes.items():
+        if "Parse" in errors:
+            cells = [f"[red]Parse failed: {escape(errors['Parse'])}[/]"] * len(platforms)
+        else:
+            cells = [
+                f"[red]{escape(errors[platform])}[/]" if errors[platform] else "[green]Done[/]"
+                for platform in platforms
+            ]
+        table.add_row(names[path], *cells)
+    return table
+
+
 @app.command()
 def publish(
-    filepath: Annotations.filepath,
+    filepath: Annotated[
+        str,
+        typer.Argument(
+            help="The filepath of the blog post, a directory of posts or a glob pattern."
+        ),
+    ],
     canonical_url: Annotated[
-        str, typer.Argument(help="The URL of the original blog post.")
+        str,
+        typer.Argument(
+            help="The URL of the original blog post. '{slug}' is replaced with each post's name."
+        ),
     ] = DEFAULT_URL,
     dry_run: Annotated[
         bool,
@@ -28,25 +64,78 @@ def publish(
     only_dev: Annotated[
         bool, typer.Option(help="If true, send post to Dev.to only.")
     ] = False,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            min=1, help="How many posts to send to Medium and Dev.to at once."
+        ),
+    ] = DEFAULT_PUBLISH_CONCURRENCY,
+    image_concurrency: Annotated[
+        int,
+        typer.Option(
+            min=1, help="How many images to process and upload to Medium at once."
+        ),
+    ] = DEFAULT_IMAGE_CONCURRENCY,
+    debug_images: Annotated[
+        bool,
+        typer.Option(
+            help="If true, write each image's conversion steps to the cache directory."
+        ),
+    ] = False,
 ):
     """Publish a draft blog posts on Dev.to and Medium."""
-    with Helpers.get_spinner("Publishing blog post...") as progress:
-        progress.add_task("")
-        if not validators.url(canonical_url):
-            raise Exception("The Canonical URL you provided is not valid.")
+    import asyncio
+    import validators
+    from .blog_parser import BlogPostParser
+    from .publisher import (
+        DEV,
+        MEDIUM,
+        PublishResult,
+        describe_error,
+        parse_posts,
+        post_names,
+        publish_posts,
+    )
 
-        Helpers.check_file_exists(filepath)
+    if not validators.url(canonical_url.replace("{slug}", "slug")):
+        raise Exception("The Canonical URL you provided is not valid.")
 
-        if only_dev and only_medium:
-            raise Exception("--only-dev and --only-medium cannot be called together.")
+    if only_dev and only_medium:
+        raise Exception("--only-dev and --only-medium cannot be called together.")
 
-        post = BlogPostParser(filepath.read_text())
+    paths = list(dict.fromkeys(path.resolve() for path in Helpers.find_posts(filepath)))
+    names = post_names(paths)
+    platforms = [MEDIUM] if only_medium else [DEV] if only_dev else [MEDIUM, DEV]
 
-        if not only_dev:
-            post.send_to_medium(canonical_url, dry_run)
+    with Helpers.get_spinner(f"Publishing {len(paths)} blog post(s)...") as progress:
+        progress.add_task("")
+
+        parsers = {}
+        results = []
+        for path, parsed in parse_posts(names).items():
+            if isinstance(parsed, BlogPostParser):
+                parsers[path] = parsed
+            else:
+                results.append(
+                    PublishResult(path, names[path], "Parse", describe_error(parsed))
+                )
+
+        if len(paths) == 1 and parsers:
+            print(next(iter(parsers.values())).post.meta)
 
-        if not only_medium:
-            post.send_to_dev(canonical_url, dry_run)
+        results += asyncio.run(
+            publish_posts(
+                parsers,
+                platforms,
+                canonical_url,
+                dry_run,
+                concurrency,
+                image_concurrency,
+                debug_images,
+            )
+        )
+
+    print(_summary_table(names, platforms, results))
 
     if canonical_url == DEFAULT_URL:
         msg = f"[yellow bold]Warning:[/yellow bold] Using default canonical URL of {DEFAULT_URL}"
@@ -55,3 +144,6 @@ def publish(
     if not dry_run:
         msg = "REMEMBER: Copy and paste the version from [bold blue]Medium[/bold blue] into [bold yellow]LinkedIn[/bold yellow]"
         print(msg)
+
+    if any(result.error for result in results):
+        raise typer.Exit(code=1)
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+from .account_cache import AccountCache
+from .blog_parser import BlogPostParser
+from ..utils import CACHE_DIR, ledger, trace
+from ..utils.transport import Transport
+
+MEDIUM = "Medium"
+DEV = "Dev.to"
+
+
+class PublishResult(NamedTuple):
+    # the resolved source file, names are only for display
+    path: Path
+    name: str
+    platform: str
+    error: Optional[str] = None
+    # seconds from the start of the run until this post was done on this platform
+    elapsed: float = 0.0
+
+
+def post_name(path: Path) -> str:
+    # material for mkdocs posts are often <slug>/index.md
+    return path.parent.name if path.stem == "index" else path.stem
+
+
+def post_names(paths: list[Path]) -> dict[Path, str]:
+    """
+    A distinct name for every post, used in the summary, for its dry run output and as its
+    {slug}. Posts whose names clash, like a.md and a/index.md, are named after their path
+    from the folder they share instead.
+    """
+    names = {path: post_name(path) for path in paths}
+    counts = Counter(names.values())
+    clashing = [path for path in paths if counts[names[path]] > 1]
+    if clashing:
+        root = Path(os.path.commonpath(clashing))
+        for path in clashing:
+            names[path] = "-".join(path.relative_to(root).with_suffix("").parts)
+
+    # a clash that is still there, e.g. with a post actually called a-index.md
+    taken: set[str] = set()
+    for path in paths:
+        name, number = names[path], 1
+        while names[path] in taken:
+            number += 1
+            names[path] = f"{name}-{number}"
+        taken.add(names[path])
+    return names
+
+
+def canonical_url_for(canonical_url: str, name: str) -> str:
+    return canonical_url.replace("{slug}", name)
+
+
+def describe_error(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def _parse_post(path: Path, name: str) -> BlogPostParser:
+    return BlogPostParser(path.read_text(), name=name)
+
+
+def parse_posts(names: dict[Path, str]) -> dict[Path, BlogPostParser | Exception]:
+    """Parse every post under its name, in a process pool when there is more than one."""
+    paths = list(names)
+    results: dict[Path, BlogPostParser | Exception] = {}
+    if len(paths) == 1:
+        try:
+            results[paths[0]] = _parse_post(paths[0], names[paths[0]])
+        except Exception as e:
+            results[paths[0]] = e
+        return results
+
+    # parsed in other processes, so only the whole step shows up when profiling
+    with trace.span("parse posts"), ProcessPoolExecutor(
+        max_workers=min(len(paths), os.cpu_count() or 1)
+    ) as pool:
+        futures = {path: pool.submit(_parse_post, path, names[path]) for path in paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+    return results
+
+
+async def publish_posts(
+    parsers: dict[Path, BlogPostParser],
+    platforms: list[str],
+    canonical_url: str,
+    dry_run: bool,
+    concurrency: int,
+    image_concurrency: int,
+    debug_images: bool,
+    cache_dir: Path = CACHE_DIR,
+) -> list[PublishResult]:
+    """
+    Send every post to every platform at once, at most `concurrency` requests at a time.
+    A failure is recorded against its post and platform rather than stopping the rest.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    # shared so posts published together only look the Medium account up once
+    account_cache = AccountCache(cache_dir)
+    start = time.perf_counter()
+
+    def record(parser: BlogPostParser, platform: str, began: float, error: Optional[str]):
+        # dry runs never reach the platforms, so there's nothing worth keeping
+        if not dry_run:
+            ledger.record(
+                ledger.PUBLISH,
+                platform,
+                time.perf_counter() - began,
+                post=parser.post_hash,
+                error=error,
+                cache_dir=cache_dir,
+            )
+
+    async def publish(
+        transport: Transport, path: Path, parser: BlogPostParser, platform: str
+    ) -> PublishResult:
+        url = canonical_url_for(canonical_url, parser.name)
+        async with semaphore:
+            began = time.perf_counter()
+            try:
+                with trace.span(f"publish {platform}", post=parser.name):
+                    if platform == MEDIUM:
+                        await parser.send_to_medium(
+                            transport,
+                            url,
+                            dry_run,
+                            image_concurrency,
+                            debug_images,
+                            account_cache,
+                        )
+                    else:
+                        await parser.send_to_dev(transport, url, dry_run)
+            except Exception as e:
+                record(parser, platform, began, describe_error(e))
+                return PublishResult(
+                    path,
+                    parser.name,
+                    platform,
+                    describe_error(e),
+                    time.perf_counter() - start,
+                )
+        record(parser, platform, began, None)
+        return PublishResult(
+            path, parser.name, platform, elapsed=time.perf_counter() - start
+        )
+
+    # one pooled transport for the whole run so connections and rate limits are shared,
+    # and a post's Medium and Dev.to requests go out side by side
+    async with Transport() as transport:
+        return await asyncio.gather(
+            *[
+                publish(transport, path, parser, platform)
+                for path, parser in parsers.items()
+                for platform in platforms
+            ]
+        )
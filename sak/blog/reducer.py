@@ -0,0 +1,141 @@
+"""
+Trims a post down to what a prompt actually needs before it is sent to the model.
+
+Front matter, snippet includes and attr_list blocks never help. Long code listings are
+worth keeping for a review, but only their opening matters for a title or description.
+"""
+
+from typing import NamedTuple, Optional
+from rich import print
+from .transforms import Pipeline, open_fence, split_paragraphs
+from ..utils import ledger
+
+# which parts of the post each kind of prompt can do without
+REDUCERS = {
+    "review": Pipeline("excerpt", "includes", "attribute_lists"),
+    "summary": Pipeline("excerpt", "includes", "attribute_lists", "code_summary"),
+}
+
+# rough characters per token for English prose and markdown, used without tiktoken
+CHARS_PER_TOKEN = 4
+
+
+class ReducedArticle(NamedTuple):
+    content: str
+    tokens: int
+    original_tokens: int
+    truncated: bool
+
+
+def strip_front_matter(content: str) -> str:
+    lines = content.split("\n")
+    if not lines or lines[0].strip() != "---":
+        return content
+    for end, line in enumerate(lines[1:], start=1):
+        if line.strip() == "---":
+            return "\n".join(lines[end + 1 :])
+    return content
+
+
+def read_front_matter(content: str) -> dict:
+    # only what the prompts need for context, so anything unreadable is just left out
+    import yaml
+
+    lines = content.split("\n")
+    if not lines or lines[0].strip() != "---":
+        return {}
+    for end, line in enumerate(lines[1:], start=1):
+        if line.strip() == "---":
+            try:
+                front_matter = yaml.safe_load("\n".join(lines[1:end]))
+            except yaml.YAMLError:
+                return {}
+            return front_matter if isinstance(front_matter, dict) else {}
+    return {}
+
+
+def estimate_tokens(text: str, model: str) -> int:
+    # tiktoken is optional, a character count is close enough to budget with
+    try:
+        import tiktoken
+    except ImportError:
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _cut_block(block: str, max_tokens: int, model: str) -> str:
+    # a single paragraph or code block over budget keeps as many lines as fit
+    kept: list[str] = []
+    used = 0
+    for line in block.split("\n"):
+        tokens = estimate_tokens(line + "\n", model)
+        if used + tokens > max_tokens:
+            if not kept:
+                # one enormous line, cut by the rough size of a token
+                kept.append(line[: max_tokens * CHARS_PER_TOKEN])
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept)
+
+
+def truncate_to_tokens(content: str, max_tokens: int, model: str) -> str:
+    # cut between paragraphs, never inside a code block, so the model never sees half a
+    # sentence, and cut into the first block rather than send nothing
+    kept: list[str] = []
+    used = 0
+    for paragraph in split_paragraphs(content):
+        tokens = estimate_tokens(paragraph + "\n\n", model)
+        if used + tokens > max_tokens:
+            if not kept:
+                kept.append(_cut_block(paragraph, max_tokens, model))
+            break
+        kept.append(paragraph)
+        used += tokens
+
+    truncated = "\n\n".join(kept)
+    fence = open_fence(truncated.split("\n"))
+    if fence is not None:
+        truncated += f"\n{fence}"
+    return truncated
+
+
+def reduce_article(
+    content: str, reducer: str, model: str, max_tokens: Optional[int] = None
+) -> ReducedArticle:
+    original_tokens = estimate_tokens(content, model)
+    reduced = REDUCERS[reducer].run(strip_front_matter(content)).strip()
+    tokens = estimate_tokens(reduced, model)
+
+    truncated = max_tokens is not None and tokens > max_tokens
+    if truncated:
+        reduced = truncate_to_tokens(reduced, max_tokens, model)
+        tokens = estimate_tokens(reduced, model)
+
+    return ReducedArticle(reduced, tokens, original_tokens, truncated)
+
+
+def prepare_article(
+    content: str, reducer: str, model: str, max_tokens: Optional[int] = None
+) -> str:
+    """Reduce a post for a prompt and say how big it is before anything is sent."""
+    # model calls from here on are recorded against this post
+    ledger.set_post(content)
+    article = reduce_article(content, reducer, model, max_tokens)
+
+    style = "yellow"
+    print(
+        f"[{style}]Article ({reducer}):[/] ~{article.tokens} tokens "
+        f"(~{article.original_tokens} before trimming)"
+    )
+    if article.truncated:
+        print(
+            f"[bold {style}]Warning:[/] the article was cut short to fit "
+            f"--max-input-tokens {max_tokens}."
+        )
+    return article.content
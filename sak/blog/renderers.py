@@ -0,0 +1,59 @@
+"""
+Per-platform renderers. Each takes the parsed (immutable) post and builds that
+platform's content on demand, so rendering can be repeated or run in parallel.
+"""
+
+import re
+from .models import BlogPost
+from .transforms import Pipeline
+
+md_image_pattern = re.compile(r"!\[(.*?)\]\((https?://[^\s\)]+)\)")
+
+dev_pipeline = Pipeline("figcaptions", "image_attributes")
+
+
+def find_images(content: str) -> dict[str, str]:
+    # each distinct image URL, in order, with the first alt text it was given
+    images = {}
+    for alt_text, url in md_image_pattern.findall(content):
+        images.setdefault(url, alt_text)
+    return images
+
+
+def replace_images(content: str, image_tags: dict[str, str]) -> str:
+    # single pass over the post: a line holding a known image becomes that image's tag.
+    # Matching on the parsed URL (rather than substrings) stops one URL clobbering
+    # another that it is a prefix of.
+    lines = content.split("\n")
+    for i, line in enumerate(lines):
+        if "![" not in line:
+            continue
+        for match in md_image_pattern.finditer(line):
+            tag = image_tags.get(match.group(2))
+            if tag is not None:
+                lines[i] = tag
+                break
+    return "\n".join(lines)
+
+
+def _with_title_and_footer(post: BlogPost, content: str, canonical_url: str) -> str:
+    # used when the hosting site doesn't take the title as metadata
+    return (
+        f"# {post.meta.title}\n{content}"
+        f"\n\n---\n*Originally published on my [blog]({canonical_url})*"
+    )
+
+
+def render_medium(post: BlogPost, canonical_url: str, image_urls: dict[str, str]) -> str:
+    """Medium can't hotlink images, so `image_urls` maps each source URL to its uploaded copy."""
+    alt_texts = find_images(post.content)
+    image_tags = {
+        url: f'<img src="{image_url}" alt="{alt_texts[url]}">'
+        for url, image_url in image_urls.items()
+    }
+    content = replace_images(post.content, image_tags)
+    return _with_title_and_footer(post, content, canonical_url)
+
+
+def render_dev(post: BlogPost) -> str:
+    return dev_pipeline.run(post.content)
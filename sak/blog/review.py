@@ -1,14 +1,35 @@
 import typer
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from pathlib import Path
+from typing import Optional
+from typing_extensions import Annotated
 from rich import print
-from ..utils import DEFAULT_AI_MODEL, Annotations, Helpers
+from ..utils import (
+    DEFAULT_AI_CONCURRENCY,
+    DEFAULT_AI_MODEL,
+    DEFAULT_MAX_INPUT_TOKENS,
+    Annotations,
+    Helpers,
+)
+from .prompts import article_messages
+from .reducer import prepare_article, read_front_matter
+
+
+# small enough that each chunk gets the model's full attention
+DEFAULT_CHUNK_TOKENS = 4_000
+
 
 class ReviewTask(BaseModel):
+    # no extra fields, so the JSON schema is accepted as a strict response format
+    model_config = ConfigDict(extra="forbid")
+
     rating: int
     comments: str
 
 
 class ReviewResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     correctness: ReviewTask
     clarity: ReviewTask
     accuracy: ReviewTask
@@ -20,7 +41,6 @@ class ReviewResponse(BaseModel):
 
 POST_REVIEWER_CONTENT = """
 You are a skilled, concise proofreader specialising in technical blog posts.
-Articles provided within triple backticks are in markdown format (for 'Material for MKDocs') and may include front matter you can ignore.
 
 Your tasks for each article:
 1. **Correctness:** Rate spelling/grammar accuracy (UK English).
@@ -39,6 +59,46 @@ Rate each task out of 5.
 **If the rating for a task is 5/5, then just provide the comment 'No comment'.**
 """
 
+
+def review_messages(user_content: str) -> list[dict]:
+    return article_messages(user_content, POST_REVIEWER_CONTENT)
+
+
+def merge_reviews(reviews: list[tuple[str, ReviewResponse, int]]) -> ReviewResponse:
+    """
+    Combine reviews of parts of a post, given as (heading, review, weight) with the
+    weight usually being the part's length. Ratings are the weighted mean so a short part
+    can't drag the whole post down, and comments are labelled with the part they are about.
+    """
+    total_weight = sum(max(weight, 1) for _, _, weight in reviews)
+    merged = {}
+    for field in ReviewResponse.model_fields:
+        rating = sum(
+            getattr(review, field).rating * max(weight, 1)
+            for _, review, weight in reviews
+        )
+        comments = [
+            f"**{heading or 'Introduction'}:** {getattr(review, field).comments.strip()}"
+            for heading, review, _ in reviews
+            if getattr(review, field).comments.strip().rstrip(".") != "No comment"
+        ]
+        merged[field] = ReviewTask(
+            rating=round(rating / total_weight),
+            comments="\n".join(comments) or "No comment",
+        )
+    return ReviewResponse(**merged)
+
+
+def print_review_task(field: str, value: ReviewTask):
+    print(f"[bold underline sky_blue1]{field.title()}[/]: {value.rating}/5")
+    print(value.comments.strip() + "\n")
+
+
+def print_review(response: ReviewResponse):
+    for field, value in response:
+        print_review_task(field, value)
+
+
 app = typer.Typer()
 
 
@@ -46,29 +106,137 @@ app = typer.Typer()
 def review(
     filepath: Annotations.filepath,
     model: Annotations.model = DEFAULT_AI_MODEL,
+    no_cache: Annotations.no_cache = False,
+    refresh: Annotations.refresh = False,
+    max_input_tokens: Annotations.max_input_tokens = DEFAULT_MAX_INPUT_TOKENS,
+    stream: Annotated[
+        bool,
+        typer.Option(
+            "--stream", help="Print each part of the review as soon as it is ready."
+        ),
+    ] = False,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Review the post a section at a time, only sending sections changed since the last review.",
+        ),
+    ] = False,
+    chunked: Annotated[
+        bool,
+        typer.Option(
+            "--chunked",
+            help="Split a long post at its ## headings and review the chunks at the same time.",
+        ),
+    ] = False,
+    chunk_tokens: Annotated[
+        int, typer.Option(help="The most tokens to put in each chunk with --chunked.")
+    ] = DEFAULT_CHUNK_TOKENS,
+    concurrency: Annotated[
+        int,
+        typer.Option(help="How many requests to run at once with --chunked or --batch."),
+    ] = DEFAULT_AI_CONCURRENCY,
+    batch: Annotated[
+        bool,
+        typer.Option(
+            "--batch",
+            help="Review every post in a directory (or glob), skipping ones already in the results file.",
+        ),
+    ] = False,
+    results: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="JSONL file for --batch results. Defaults to reviews.jsonl in the directory."
+        ),
+    ] = None,
+    provider_batch: Annotated[
+        bool,
+        typer.Option(
+            "--provider-batch",
+            help="With --batch, use OpenAI's cheaper but slower batch API.",
+        ),
+    ] = False,
 ):
     """
     Send a blog post to ChatGPT for review.
     """
-    Helpers.check_file_exists(filepath)
     Helpers.validate_model(model)
 
-    user_content = filepath.read_text()
+    if sum([stream, incremental, chunked, batch]) > 1:
+        print(
+            "[bold red]Error: only one of --stream, --incremental, --chunked and --batch can be used."
+        )
+        raise typer.Exit(code=1)
+
+    if batch:
+        from .batch_review import review_batch
+
+        review_batch(
+            str(filepath),
+            model,
+            concurrency,
+            max_input_tokens,
+            results,
+            provider_batch,
+            use_cache=not no_cache,
+            refresh=refresh,
+        )
+        return
+
+    Helpers.check_file_exists(filepath)
+
+    content = filepath.read_text()
+    user_content = prepare_article(content, "review", model, max_input_tokens)
+
+    title = str(read_front_matter(content).get("title") or filepath.stem)
+
+    if incremental:
+        from .section_review import review_sections
+
+        print_review(
+            review_sections(
+                user_content, title, model, use_cache=not no_cache, refresh=refresh
+            )
+        )
+        return
+
+    if chunked:
+        from .chunked_review import review_chunked
+
+        print_review(
+            review_chunked(
+                user_content,
+                title,
+                model,
+                chunk_tokens,
+                concurrency,
+                use_cache=not no_cache,
+                refresh=refresh,
+            )
+        )
+        return
+
+    if stream:
+        with Helpers.get_spinner("Reviewing blog post...") as progress:
+            progress.add_task("")
+            Helpers.query_gpt_stream(
+                model=model,
+                messages=review_messages(user_content),
+                response_format=ReviewResponse,
+                on_field=print_review_task,
+                use_cache=not no_cache,
+                refresh=refresh,
+            )
+        return
 
     with Helpers.get_spinner("Reviewing blog post...") as progress:
         progress.add_task("")
         response = Helpers.query_gpt(
             model=model,
-            messages=[
-                {"role": "system", "content": POST_REVIEWER_CONTENT},
-                {
-                    "role": "user",
-                    "content": f"Analyse this article: ```{user_content}```",
-                },
-            ],
+            messages=review_messages(user_content),
             response_format=ReviewResponse,
+            use_cache=not no_cache,
+            refresh=refresh,
         )
 
-    for field, value in response:
-        print(f"[bold underline sky_blue1]{field.title()}[/]: {value.rating}/5")
-        print(value.comments.strip() + "\n")
+    print_review(response)
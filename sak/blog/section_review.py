@@ -0,0 +1,112 @@
+"""
+Reviews a post one section at a time. Each section's review is cached against a hash of
+its content, so after an edit only the sections that changed are sent to the model.
+"""
+
+import typer
+from pydantic import BaseModel
+from rich import print
+from ..utils import CACHE_DIR, Helpers
+from ..utils.llm_cache import LLMCache
+from .prompts import article_messages
+from .review import POST_REVIEWER_CONTENT, ReviewResponse, merge_reviews
+from .sections import Section, split_sections
+
+SECTION_REVIEWER_CONTENT = (
+    POST_REVIEWER_CONTENT
+    + """
+You have only been given some sections of the article "{title}". Each one starts with a comment such as <!-- section 1 -->.
+Review each section on its own and return one review for every section, with the number from its comment.
+"""
+)
+
+
+class SectionReview(BaseModel):
+    section: int
+    review: ReviewResponse
+
+
+class SectionReviewResponse(BaseModel):
+    sections: list[SectionReview]
+
+
+def section_key(model: str, title: str, section: Section) -> str:
+    # the post title is the only context a section gets, so other edits don't invalidate it
+    return LLMCache.key(
+        model,
+        [SECTION_REVIEWER_CONTENT, title, section.heading, section.content],
+        ReviewResponse.model_json_schema(),
+    )
+
+
+def section_review_messages(title: str, sections: dict[int, Section]) -> list[dict]:
+    content = "\n\n".join(
+        f"<!-- section {number} -->\n{section.content}"
+        for number, section in sections.items()
+    )
+    return article_messages(content, SECTION_REVIEWER_CONTENT.format(title=title))
+
+
+def review_sections(
+    content: str, title: str, model: str, use_cache: bool = True, refresh: bool = False
+) -> ReviewResponse:
+    # sections are numbered from 1 in the order they appear in the post
+    sections = dict(enumerate(split_sections(content), start=1))
+    keys = {number: section_key(model, title, section) for number, section in sections.items()}
+    reviews: dict[int, ReviewResponse] = {}
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    llm_cache = LLMCache(CACHE_DIR)
+    try:
+        if use_cache and not refresh:
+            for number, key in keys.items():
+                cached = llm_cache.get(key)
+                if cached is not None:
+                    reviews[number] = ReviewResponse.model_validate_json(cached.response)
+
+        changed = {number: sections[number] for number in sections if number not in reviews}
+        print(
+            f"[yellow]Sections:[/] {len(changed)} to review, "
+            f"{len(sections) - len(changed)} unchanged"
+        )
+
+        if changed:
+            with Helpers.get_spinner("Reviewing changed sections...") as progress:
+                progress.add_task("")
+                # only the reviews of the sections that came back are worth keeping, a
+                # cached reply missing some would keep them missing on every run
+                response = Helpers.query_gpt(
+                    model=model,
+                    messages=section_review_messages(title, changed),
+                    response_format=SectionReviewResponse,
+                    use_cache=False,
+                )
+
+            for item in response.sections:
+                if item.section not in changed or item.section in reviews:
+                    continue
+                reviews[item.section] = item.review
+                if use_cache:
+                    llm_cache.put(
+                        keys[item.section], model, item.review.model_dump_json(), 0, 0
+                    )
+            llm_cache.prune()
+
+            missing = [number for number in changed if number not in reviews]
+            if missing:
+                headings = ", ".join(sections[n].heading or "Introduction" for n in missing)
+                print(f"[bold yellow]Warning:[/] no review came back for {headings}.")
+    finally:
+        llm_cache.close()
+
+    if not reviews:
+        print("[bold red]Error: no sections of the post were reviewed.")
+        raise typer.Exit(code=1)
+
+    return merge_reviews(
+        [
+            (section.heading, reviews[number], len(section.content))
+            for number, section in sections.items()
+            if number in reviews
+        ]
+    )
@@ -0,0 +1,30 @@
+from typing import NamedTuple
+from .transforms import tokenize
+
+
+class Section(NamedTuple):
+    # empty for whatever comes before the first heading
+    heading: str
+    content: str
+
+
+def split_sections(content: str, max_level: int = 2) -> list[Section]:
+    """
+    Split a post at its headings, down to `max_level`. Each section keeps its heading line.
+    Lines inside code fences are never treated as headings.
+    """
+    sections: list[Section] = []
+    heading, lines = "", []
+
+    for line in tokenize(content.split("\n")):
+        text = line.text
+        level = len(text) - len(text.lstrip("#"))
+        if not line.in_code and 0 < level <= max_level and text[level : level + 1] == " ":
+            if heading or "\n".join(lines).strip():
+                sections.append(Section(heading, "\n".join(lines).strip()))
+            heading, lines = text[level:].strip(), []
+        lines.append(text)
+
+    if heading or "\n".join(lines).strip():
+        sections.append(Section(heading, "\n".join(lines).strip()))
+    return sections
@@ -1,7 +1,9 @@
 import typer
 from rich import print
-import pyperclip
-from ..utils import DEFAULT_AI_MODEL, Helpers, Annotations
+from ..utils import DEFAULT_AI_MODEL, DEFAULT_MAX_INPUT_TOKENS, Helpers, Annotations
+from .candidates import select_candidate
+from .prompts import article_messages
+from .reducer import prepare_article
 from pydantic import BaseModel
 
 
@@ -9,14 +11,28 @@ class TitleResponse(BaseModel):
     titles: list[str]
 
 
+# the same limits the prompt asks for, anything else is left out
+TITLE_LENGTH = (30, 50)
+
+
 TITLE_GENERATOR_CONTENT = """
-You are a skilled, concise summariser specialising in technical blog posts and SEO. Articles provided within triple backticks are in markdown format (for 'Material for MKDocs') and may include front matter you can ignore.
+You are a skilled, concise summariser specialising in technical blog posts and SEO.
 
 Your task is to create **three distinct one-line titles** that will pique the reader's curiosity and entice them to read the full article. Use UK spelling and grammar.
 
 Your titles MUST be between 30 and 50 characters.
 """
 
+
+def title_messages(user_content: str) -> list[dict]:
+    return article_messages(user_content, TITLE_GENERATOR_CONTENT)
+
+
+def print_titles(response: TitleResponse):
+    for i, title in enumerate(response.titles, start=1):
+        print(f"[bold underline sky_blue1]Title {i}[/]\n{title}\n")
+
+
 app = typer.Typer()
 
 
@@ -24,40 +40,43 @@ app = typer.Typer()
 def title(
     filepath: Annotations.filepath,
     model: Annotations.model = DEFAULT_AI_MODEL,
+    no_cache: Annotations.no_cache = False,
+    refresh: Annotations.refresh = False,
+    max_input_tokens: Annotations.max_input_tokens = DEFAULT_MAX_INPUT_TOKENS,
 ):
     """
     Send a blog post to ChatGPT to generate a title. The result is copied to your clipboard.
     """
+    import pyperclip
+
     Helpers.check_file_exists(filepath)
     Helpers.validate_model(model)
 
-    user_content = filepath.read_text()
+    user_content = prepare_article(
+        filepath.read_text(), "summary", model, max_input_tokens
+    )
 
     with Helpers.get_spinner("Generating titles...") as progress:
         progress.add_task("")
 
         response = Helpers.query_gpt(
             model=model,
-            messages=[
-                {"role": "system", "content": TITLE_GENERATOR_CONTENT},
-                {
-                    "role": "user",
-                    "content": f"Create a title this article: ```{user_content}```",
-                },
-            ],
+            messages=title_messages(user_content),
             response_format=TitleResponse,
+            use_cache=not no_cache,
+            refresh=refresh,
         )
 
-    for i, title in enumerate(response.titles, start=1):
-        print(f"[bold underline sky_blue1]Title {i}[/]\n{title}\n")
-
-    selection = int(
-        typer.prompt(
-            f"Which title would you like to copy? ('{Helpers.none_selection}' for None)"
-        )
+    choice = select_candidate(
+        "title",
+        response.titles,
+        title_messages(user_content),
+        TitleResponse,
+        "titles",
+        print_titles,
+        model,
+        length=TITLE_LENGTH,
     )
 
-    Helpers.isNoneSelection(selection)
-
-    pyperclip.copy(response.titles[selection - 1])
+    pyperclip.copy(choice)
     print("[green]Copied to clipboard![/]")
@@ -0,0 +1,358 @@
+"""
+Line-oriented markdown transforms.
+
+A post is tokenized once into lines that know whether they sit inside a fenced
+code block. Each transform is a registered stage: a generator that takes lines and
+yields lines, so a pipeline of stages runs as a single streaming pass over the post.
+"""
+
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+from .errors import BlogParserError
+
+
+class Line(NamedTuple):
+    text: str
+    # true for fence delimiters and everything between them
+    in_code: bool
+
+
+Stage = Callable[[Iterable[Line]], Iterator[Line]]
+
+STAGES: dict[str, Stage] = {}
+
+# map for converting admonitions into a "quote with relevant emoji"
+NOTE_TYPES = {
+    "note": ":memo:",
+    "abstract": ":notebook:",
+    "info": ":information:",
+    "tip": ":fire:",
+    "success": ":check_mark_button:",
+    "question": ":red_question_mark:",
+    "warning": ":warning:",
+    "failure": ":cross_mark:",
+    "danger": ":radioactive:",
+    "bug": ":cockroach:",
+    "example": ":test_tube:",
+    "quote": ":speaking_head:",
+}
+
+EXCERPT_MARKER = "<!-- more -->"
+INCLUDE_MARKER = "--8<--"
+
+fence_pattern = re.compile(r"^\s*(`{3,}|~{3,})")
+admonition_pattern = re.compile(r'^(?:!!!|\?\?\?\+?) (\w+)(?:\s+"([^"]+)")?\s*$')
+figcaption_pattern = re.compile(r"\s+<figcaption>")
+shortcode_pattern = re.compile(r":[^\s:]+:")
+header_pattern = re.compile(r"^((?:> ?)*)(#{2,})")
+curly_brace_pattern = re.compile(r"(!\[.*?\]\(https?://[^\)]+\))\s*\{.*?\}")
+# attr_list blocks such as `{ .class #id key="value" }`, anywhere in a line
+_attribute = r"""(?:[.#][\w-]+|[\w-]+=(?:"[^"]*"|'[^']*'|[^\s}]+))"""
+attribute_list_pattern = re.compile(rf"\s*\{{:?\s*{_attribute}(?:\s+{_attribute})*\s*\}}")
+
+# how much of a long code block is kept when code is summarised
+CODE_PREVIEW_LINES = 3
+
+
+def stage(name: str) -> Callable[[Stage], Stage]:
+    """Register a transform so pipelines can refer to it by name."""
+
+    def register(func: Stage) -> Stage:
+        STAGES[name] = func
+        return func
+
+    return register
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[Line]:
+    fence = None
+    for text in lines:
+        match = ("`" in text or "~" in text) and fence_pattern.match(text)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+            yield Line(text, fence is not None)
+            continue
+
+        yield Line(text, True)
+        # a fence is closed by a bare run of the same character that is at least as long
+        marker = text.strip()
+        if match and marker == match.group(1) and marker.startswith(fence):
+            fence = None
+
+
+def open_fence(lines: Iterable[str]) -> Optional[str]:
+    """The marker of a code block still open after `lines`, e.g. once a post is cut short."""
+    fence = None
+    for text in lines:
+        match = ("`" in text or "~" in text) and fence_pattern.match(text)
+        if not match:
+            continue
+        if fence is None:
+            fence = match.group(1)
+        elif text.strip() == match.group(1) and match.group(1).startswith(fence):
+            fence = None
+    return fence
+
+
+def split_paragraphs(content: str) -> list[str]:
+    # blank lines inside code fences don't end a paragraph
+    paragraphs, lines = [], []
+    for line in tokenize(content.split("\n")):
+        if not line.in_code and not line.text.strip():
+            if lines:
+                paragraphs.append("\n".join(lines))
+            lines = []
+            continue
+        lines.append(line.text)
+    if lines:
+        paragraphs.append("\n".join(lines))
+    return paragraphs
+
+
+class Pipeline:
+    def __init__(self, *stage_names: str):
+        self.stages = [STAGES[name] for name in stage_names]
+
+    def run(self, content: str) -> str:
+        lines = tokenize(content.split("\n"))
+        for transform in self.stages:
+            lines = transform(lines)
+        return "\n".join(line.text for line in lines)
+
+
+def note_type_to_emoji(note_type: str) -> str:
+    # used when converting admonitions. This swaps out the note type for a relevant emoji.
+    if note_type not in NOTE_TYPES:
+        raise BlogParserError(f"Note type '{note_type}' does not have a declared Mapping")
+    return NOTE_TYPES[note_type]
+
+
+@stage("excerpt")
+def remove_excerpt_marker(lines: Iterable[Line]) -> Iterator[Line]:
+    for line in lines:
+        if line.in_code or line.text != EXCERPT_MARKER:
+            yield line
+
+
+class AdmonitionConverter:
+    """
+    Turns admonitions into quotes, one line at a time.
+
+    An admonition is a `!!!`, `???` or `???+` header, an optional blank line, then a body
+    indented by four spaces. The body is dedented and fed to a child converter, so nested
+    admonitions become nested quotes. Each line is handled once per level of nesting.
+    """
+
+    def __init__(self):
+        self.header: Optional[tuple[str, Optional[str]]] = None
+        # header (and blank line) of what may turn out to be an admonition
+        self.pending: list[Line] = []
+        # blank lines inside a body, held until we know whether the body carries on
+        self.blanks: list[Line] = []
+        self.body: Optional[AdmonitionConverter] = None
+
+    def _feed_body(self, line: Line, out: list[Line]):
+        body_out: list[Line] = []
+        self.body.feed(Line(line.text[4:], line.in_code), body_out)
+        out.extend([Line(f"> {quoted.text}", quoted.in_code) for quoted in body_out])
+
+    def _close_body(self, out: list[Line]):
+        body_out: list[Line] = []
+        self.body.close(body_out)
+        out.extend([Line(f"> {quoted.text}", quoted.in_code) for quoted in body_out])
+        self.body = None
+
+    def feed(self, line: Line, out: list[Line]):
+        if self.body is not None:
+            if line.text.startswith("    "):
+                for blank in self.blanks:
+                    self._feed_body(Line("", blank.in_code), out)
+                self.blanks = []
+                self._feed_body(line, out)
+                return
+            if not line.text.strip():
+                self.blanks.append(line)
+                return
+            # trailing blank lines are not part of the body
+            self._close_body(out)
+            out.extend(self.blanks)
+            self.blanks = []
+
+        if self.header is not None:
+            if len(self.pending) == 1 and not line.text.strip():
+                self.pending.append(line)
+                return
+            if line.text.startswith("    "):
+                note_type, title = self.header
+                note_emoji = note_type_to_emoji(note_type)
+                out.append(Line(f"> {note_emoji} **{title or note_type.title()}**", False))
+                out.append(Line("", False))
+                self.header, self.pending = None, []
+                self.body = AdmonitionConverter()
+                self._feed_body(line, out)
+                return
+            # not an admonition after all
+            out.extend(self.pending)
+            self.header, self.pending = None, []
+
+        match = (
+            not line.in_code
+            and line.text[:1] in ("!", "?")
+            and admonition_pattern.match(line.text)
+        )
+        if match:
+            self.header, self.pending = match.groups(), [line]
+            return
+        out.append(line)
+
+    def close(self, out: list[Line]):
+        if self.body is not None:
+            self._close_body(out)
+        out.extend(self.pending)
+        out.extend(self.blanks)
+        self.header, self.pending, self.blanks = None, [], []
+
+
+@stage("admonitions")
+def transform_admonitions(lines: Iterable[Line]) -> Iterator[Line]:
+    converter = AdmonitionConverter()
+    out: list[Line] = []
+    for line in lines:
+        converter.feed(line, out)
+        if out:
+            yield from out
+            out.clear()
+    converter.close(out)
+    yield from out
+
+
+@stage("headers")
+def replace_headers(lines: Iterable[Line]) -> Iterator[Line]:
+    # Turn level 2 headers into level 1 and level 3 (and deeper) headers into level 2,
+    # including headers inside quotes, which is where admonition bodies end up
+    for line in lines:
+        match = None if line.in_code else header_pattern.match(line.text)
+        if match:
+            quote, hashes = match.groups()
+            level = min(len(hashes) - 1, 2)
+            line = Line(quote + "#" * level + line.text[match.end() :], line.in_code)
+        yield line
+
+
+@stage("emoji")
+def emojize(lines: Iterable[Line]) -> Iterator[Line]:
+    # imported here, the blog commands load this module just to build their help
+    import emoji
+
+    for line in lines:
+        # cheap check first, most lines with a colon are URLs rather than shortcodes
+        if not line.in_code and shortcode_pattern.search(line.text):
+            line = Line(emoji.emojize(line.text, language="alias"), line.in_code)
+        yield line
+
+
+@stage("includes")
+def remove_includes(lines: Iterable[Line]) -> Iterator[Line]:
+    # snippet includes usually live inside code fences, so these go regardless
+    for line in lines:
+        if INCLUDE_MARKER not in line.text:
+            yield line
+
+
+@stage("figcaptions")
+def tighten_figcaptions(lines: Iterable[Line]) -> Iterator[Line]:
+    # Dev.to wants a <figcaption> directly under its image, so drop the whitespace before it.
+    # The previous line and any blank lines after it are held back in case one follows.
+    previous = None
+    blanks: list[Line] = []
+
+    for line in lines:
+        if line.in_code or "<figcaption>" not in line.text:
+            if previous is not None and not line.in_code and not line.text.strip():
+                blanks.append(line)
+                continue
+            if previous is not None:
+                yield previous
+            yield from blanks
+            previous, blanks = line, []
+            continue
+
+        text = line.text
+        if previous is not None and text.lstrip().startswith("<figcaption>"):
+            previous = Line(previous.text.rstrip(), previous.in_code)
+            blanks, text = [], text.lstrip()
+
+        if previous is not None:
+            yield previous
+        yield from blanks
+        blanks = []
+
+        *split, previous = [
+            Line(part, line.in_code)
+            for part in figcaption_pattern.sub("\n<figcaption>", text).split("\n")
+        ]
+        yield from split
+
+    if previous is not None:
+        yield previous
+    yield from blanks
+
+
+@stage("image_attributes")
+def remove_image_attributes(lines: Iterable[Line]) -> Iterator[Line]:
+    # This is the extra css that can be passed into material for mkdocs
+    for line in lines:
+        if not line.in_code and "{" in line.text:
+            line = Line(curly_brace_pattern.sub(r"\1", line.text), line.in_code)
+        yield line
+
+
+@stage("attribute_lists")
+def remove_attribute_lists(lines: Iterable[Line]) -> Iterator[Line]:
+    # like image_attributes, but for every attr_list in the post
+    for line in lines:
+        if not line.in_code and "{" in line.text:
+            text = attribute_list_pattern.sub("", line.text)
+            if text.strip() or not line.text.strip():
+                yield Line(text, line.in_code)
+            continue
+        yield line
+
+
+@stage("code_summary")
+def summarise_code(lines: Iterable[Line]) -> Iterator[Line]:
+    # Keep the opening of each code block and say how much was left out.
+    # The closing fence is the last line of the block, so it is always kept.
+    block: list[Line] = []
+    for line in lines:
+        if line.in_code:
+            block.append(line)
+            fence = fence_pattern.match(block[0].text)
+            closed = (
+                len(block) > 1
+                and fence is not None
+                and line.text.strip().startswith(fence.group(1))
+                and not line.text.strip().strip(fence.group(1)[0])
+            )
+            if not closed:
+                continue
+        if block:
+            yield from _summarise_block(block)
+            block = []
+        if not line.in_code:
+            yield line
+    yield from _summarise_block(block)
+
+
+def _summarise_block(block: list[Line]) -> Iterator[Line]:
+    # the fences plus the preview, with room for the note that replaces the rest
+    if len(block) <= CODE_PREVIEW_LINES + 3:
+        yield from block
+        return
+
+    body, closing = block[1:-1], block[-1]
+    yield block[0]
+    yield from body[:CODE_PREVIEW_LINES]
+    yield Line(f"... ({len(body) - CODE_PREVIEW_LINES} more lines)", True)
+    yield closing
@@ -0,0 +1,117 @@
+import typer
+from datetime import datetime
+from typing_extensions import Annotated
+from rich import print
+from typing import Optional
+from .blog.account_cache import AccountCache
+from .blog import image_cache as image_limits
+from .blog.image_cache import ImageCache
+from .utils import CACHE_DIR
+from .utils.helpers import format_bytes
+from .utils import llm_cache as llm_limits
+from .utils.llm_cache import LLMCache
+
+app = typer.Typer(no_args_is_help=True, help="Inspect and prune the local cache.")
+
+
+def _format_time(timestamp: float | None) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+@app.command()
+def info():
+    """
+    Show what is stored in the cache.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"[bold]Cache directory:[/] {CACHE_DIR}\n")
+
+    image_cache = ImageCache(CACHE_DIR)
+    stats = image_cache.stats()
+    image_cache.close()
+
+    style = "sky_blue1"
+    print(f"[bold underline {style}]Medium images[/]")
+    print(f"[{style}]Entries:[/] {stats.entries}")
+    print(f"[{style}]Source images:[/] {format_bytes(stats.source_bytes)}")
+    print(f"[{style}]On disk:[/] {format_bytes(stats.disk_bytes)}")
+    print(
+        f"[{style}]Limits:[/] {image_limits.DEFAULT_MAX_ENTRIES} entries, "
+        f"{format_bytes(image_limits.DEFAULT_MAX_BYTES)} of images, "
+        f"{image_limits.DEFAULT_MAX_AGE_DAYS} days unused"
+    )
+    print(f"[{style}]Least recently used:[/] {_format_time(stats.oldest)}")
+    print(f"[{style}]Most recently used:[/] {_format_time(stats.newest)}")
+
+    llm_cache = LLMCache(CACHE_DIR)
+    llm_stats = llm_cache.stats()
+    llm_cache.close()
+
+    print(f"\n[bold underline {style}]LLM responses[/]")
+    print(f"[{style}]Entries:[/] {llm_stats.entries}")
+    print(f"[{style}]Responses:[/] {format_bytes(llm_stats.response_bytes)}")
+    print(f"[{style}]On disk:[/] {format_bytes(llm_stats.disk_bytes)}")
+    print(
+        f"[{style}]Limits:[/] {llm_limits.DEFAULT_MAX_ENTRIES} entries, "
+        f"{format_bytes(llm_limits.DEFAULT_MAX_BYTES)} of responses, "
+        f"{llm_limits.DEFAULT_MAX_AGE_DAYS} days unused"
+    )
+    print(f"[{style}]Least recently used:[/] {_format_time(llm_stats.oldest)}")
+    print(f"[{style}]Most recently used:[/] {_format_time(llm_stats.newest)}")
+
+    print(f"\n[bold underline {style}]Medium accounts[/]")
+    print(f"[{style}]Entries:[/] {AccountCache(CACHE_DIR).entries()}")
+
+
+@app.command()
+def prune(
+    max_age: Annotated[
+        Optional[float],
+        typer.Option(
+            help="Remove entries not used in this many days. Defaults to each cache's own limit."
+        ),
+    ] = None,
+    max_entries: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Keep at most this many entries per cache. Defaults to each cache's own limit."
+        ),
+    ] = None,
+    max_mb: Annotated[
+        Optional[float],
+        typer.Option(
+            help="Keep at most this many megabytes of images or responses per cache, "
+            "least recently used first out. Defaults to each cache's own limit."
+        ),
+    ] = None,
+    all: Annotated[bool, typer.Option("--all", help="Remove everything.")] = False,
+):
+    """
+    Remove old entries from the cache.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    limits = {}
+    if max_age is not None:
+        limits["max_age_days"] = max_age
+    if max_entries is not None:
+        limits["max_entries"] = max_entries
+    if max_mb is not None:
+        limits["max_bytes"] = int(max_mb * 1024 * 1024)
+
+    image_cache = ImageCache(CACHE_DIR)
+    removed = image_cache.clear() if all else image_cache.prune(**limits)
+    image_cache.close()
+
+    llm_cache = LLMCache(CACHE_DIR)
+    removed_responses = llm_cache.clear() if all else llm_cache.prune(**limits)
+    llm_cache.close()
+
+    # account entries already expire after a fixed time, so only --all changes what's kept
+    account_cache = AccountCache(CACHE_DIR)
+    removed_accounts = account_cache.clear() if all else account_cache.prune()
+
+    print(f"[green]Removed {removed} Medium image entries.[/]")
+    print(f"[green]Removed {removed_responses} LLM response entries.[/]")
+    print(f"[green]Removed {removed_accounts} Medium account entries.[/]")
@@ -0,0 +1,214 @@
+import typer
+from typing_extensions import Annotated
+from rich import print
+from .utils import DEFAULT_IMAGE_CONCURRENCY, DEFAULT_PUBLISH_CONCURRENCY
+
+app = typer.Typer(
+    no_args_is_help=True,
+    help="Run sak against a local stand-in for Medium, Dev.to and OpenAI.",
+)
+
+Latency = Annotated[
+    float, typer.Option(min=0, help="Seconds the server waits before every response.")
+]
+Jitter = Annotated[
+    float, typer.Option(min=0, help="Up to this many seconds added to or taken off the latency.")
+]
+RateLimited = Annotated[
+    float, typer.Option(min=0, max=1, help="Share of requests answered with a 429.")
+]
+Failures = Annotated[
+    float, typer.Option(min=0, max=1, help="Share of requests answered with a 500.")
+]
+Seed = Annotated[int, typer.Option(help="Seed for the injected faults.")]
+ImageSize = Annotated[
+    int, typer.Option(min=1, help="Width and height in pixels of the images served.")
+]
+
+FRONT_MATTER = """---
+draft: false
+authors:
+  - sak
+date:
+  created: 2024-05-01
+categories:
+  - Load Test
+tags:
+  - load-test
+description: A post generated by sak loadtest.
+title: Load Test Post {number}
+---
+"""
+
+
+def synthetic_post(image_url, number: int, images: int) -> str:
+    # the main image is the first of the post's images
+    lines = [
+        FRONT_MATTER.format(number=number),
+        f"![main-image]({image_url(f'{number}-0')})",
+        "",
+        "An introduction :rocket:",
+        "",
+        "<!-- more -->",
+    ]
+    for i in range(1, images):
+        lines += [
+            "",
+            f"## Part {i}",
+            "",
+            "!!! note",
+            "",
+            f"    Some words about part {i}.",
+            "",
+            f"![Figure {i}]({image_url(f'{number}-{i}')})",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _latency_table(results: list, platforms: list[str]):
+    from rich.table import Table
+    from .utils.ledger import percentile
+
+    table = Table(title="Latency (s)")
+    for column in ["Platform", "Done", "Failed", "p50", "p95", "Max"]:
+        table.add_column(column, justify="left" if column == "Platform" else "right")
+
+    for platform in platforms:
+        elapsed = [r.elapsed for r in results if r.platform == platform]
+        failed = sum(1 for r in results if r.platform == platform and r.error)
+        table.add_row(
+            platform,
+            str(len(elapsed) - failed),
+            f"[red]{failed}[/]" if failed else "0",
+            f"{percentile(elapsed, 0.5):.2f}",
+            f"{percentile(elapsed, 0.95):.2f}",
+            f"{max(elapsed):.2f}",
+        )
+    return table
+
+
+def _requests_table(requests):
+    from rich.table import Table
+
+    statuses = sorted({status for _, status in requests})
+    table = Table(title="Requests served")
+    table.add_column("Route")
+    for status in statuses:
+        table.add_column(str(status), justify="right")
+
+    for route in sorted({route for route, _ in requests}):
+        table.add_row(route, *[str(requests[route, status]) for status in statuses])
+    return table
+
+
+@app.command()
+def serve(
+    host: Annotated[str, typer.Option(help="Address to listen on.")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to listen on.")] = 8787,
+    latency: Latency = 0.0,
+    jitter: Jitter = 0.0,
+    rate_limited: RateLimited = 0.0,
+    failures: Failures = 0.0,
+    seed: Seed = 0,
+    image_size: ImageSize = 256,
+):
+    """
+    Run the stand-in server until stopped, so any sak command can be pointed at it.
+    """
+    from .utils.fake_server import FakeServer, Faults
+
+    faults = Faults(latency, jitter, rate_limited, failures, seed=seed)
+    server = FakeServer(host, port, faults, image_size)
+
+    print(f"[bold]Serving on[/] {server.base_url}, point sak at it with:\n")
+    for name, value in server.env().items():
+        print(f"export {name}={value}")
+    print(f"\nImages are served from {server.image_url('<name>')}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(_requests_table(server.requests))
+
+
+@app.command()
+def publish(
+    posts: Annotated[int, typer.Option(min=1, help="How many posts to publish.")] = 10,
+    images: Annotated[
+        int, typer.Option(min=1, help="How many images each post has, main image included.")
+    ] = 5,
+    concurrency: Annotated[
+        int, typer.Option(min=1, help="How many posts to send at once.")
+    ] = DEFAULT_PUBLISH_CONCURRENCY,
+    image_concurrency: Annotated[
+        int, typer.Option(min=1, help="How many images to upload at once per post.")
+    ] = DEFAULT_IMAGE_CONCURRENCY,
+    latency: Latency = 0.05,
+    jitter: Jitter = 0.02,
+    rate_limited: RateLimited = 0.0,
+    failures: Failures = 0.0,
+    seed: Seed = 0,
+    image_size: ImageSize = 256,
+):
+    """
+    Publish synthetic posts to the stand-in server and report latency and throughput.
+    Nothing leaves the machine and the real caches aren't touched.
+    """
+    import asyncio
+    import os
+    import tempfile
+    import time
+    from pathlib import Path
+    from .blog.blog_parser import BlogPostParser
+    from .blog.publisher import DEV, MEDIUM, publish_posts
+    from .utils.fake_server import FakeServer, Faults
+
+    faults = Faults(latency, jitter, rate_limited, failures, seed=seed)
+    platforms = [MEDIUM, DEV]
+
+    with tempfile.TemporaryDirectory() as cache_dir, FakeServer(
+        faults=faults, image_size=image_size
+    ) as server:
+        os.environ.update(server.env())
+
+        parsers = {}
+        for number in range(posts):
+            parser = BlogPostParser(
+                synthetic_post(server.image_url, number, images), name=f"post-{number}"
+            )
+            # a fresh cache every run, so every image is converted and uploaded
+            parser.sak_cache = Path(cache_dir)
+            parsers[Path(cache_dir) / f"{parser.name}.md"] = parser
+
+        start = time.perf_counter()
+        results = asyncio.run(
+            publish_posts(
+                parsers,
+                platforms,
+                "https://example.com/{slug}",
+                False,
+                concurrency,
+                image_concurrency,
+                False,
+                cache_dir=Path(cache_dir),
+            )
+        )
+        wall = time.perf_counter() - start
+
+    uploaded = server.requests["images", 201]
+    print(_latency_table(results, platforms))
+    print(_requests_table(server.requests))
+    print(
+        f"[bold]{posts} posts with {images} images in {wall:.2f}s:[/] "
+        f"{posts / wall:.1f} posts/s, {uploaded / wall:.1f} images/s, "
+        f"{server.received_bytes / 1024**2 / wall:.1f} MB/s sent"
+    )
+
+    errors = [result for result in results if result.error]
+    for result in errors[:5]:
+        print(f"[red]{result.name} on {result.platform}: {result.error}")
+    if errors:
+        raise typer.Exit(code=1)
@@ -1,14 +1,44 @@
 import typer
-from .version import app as version_app
-from .blog import app as blog_app
+from typing import Optional
+from typing_extensions import Annotated
+from .utils import ledger, lazy_group, trace
 
 OVERVIEW = """
 Swiss Army Knife (sak).
 
 The following environment variables need to exist:\n\n- OPENAI_API_KEY\n\n- MEDIUM_API_KEY\n\n- DEV_API_KEY
+
+MEDIUM_API_URL, DEV_API_URL and OPENAI_BASE_URL point sak at other servers, such as `sak loadtest serve`.
 """
 
-app = typer.Typer(no_args_is_help=True, help=OVERVIEW)
+# commands are imported on first use so cold starts (hooks, completion) stay fast
+COMMANDS = {
+    "version": "sak.version:app",
+    "blog": "sak.blog:app",
+    "cache": "sak.cache:app",
+    "loadtest": "sak.loadtest:app",
+    "stats": "sak.stats:app",
+}
+
+app = typer.Typer(cls=lazy_group(COMMANDS), no_args_is_help=True, help=OVERVIEW)
+
 
-app.add_typer(version_app)
-app.add_typer(blog_app, name="blog")
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            help=f"Time each stage (parsing, downloads, uploads, model calls) and print a summary at the end. Also turned on by {trace.TRACE_ENV}."
+        ),
+    ] = False,
+    trace_file: Annotated[
+        Optional[str],
+        typer.Option(help="Also write the timings to this file as a Chrome trace."),
+    ] = None,
+):
+    ledger.enter_command(ctx.invoked_subcommand, root=True)
+    if profile or trace_file:
+        trace.enable(trace_file)
+    else:
+        trace.enable_from_env()
@@ -0,0 +1,110 @@
+import time
+import typer
+from typing_extensions import Annotated
+from rich import print
+from rich.table import Table
+from .utils import CACHE_DIR
+from .utils.helpers import format_bytes
+from .utils.ledger import DEFAULT_KEEP_DAYS, LLM, PUBLISH, Ledger, percentile
+
+app = typer.Typer()
+
+
+def _format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+def _latency_table(ledger: Ledger, since: float, days: int) -> Table:
+    # local cache hits never reach the model, so they'd only drag the percentiles down
+    samples: dict[tuple[str, str, str], list[float]] = {}
+    for event in ledger.events(since):
+        if event.kind == LLM and event.cache == "hit":
+            continue
+        samples.setdefault((event.kind, event.command, event.model), []).append(
+            event.latency
+        )
+
+    table = Table(title=f"Latency, last {days} days")
+    table.add_column("Kind")
+    table.add_column("Command")
+    table.add_column("Model / platform")
+    for column in ["Calls", "p50", "p95"]:
+        table.add_column(column, justify="right")
+    for (kind, command, model), latencies in sorted(samples.items()):
+        table.add_row(
+            kind,
+            command,
+            model,
+            str(len(latencies)),
+            _format_seconds(percentile(latencies, 0.5)),
+            _format_seconds(percentile(latencies, 0.95)),
+        )
+    return table
+
+
+def _spend_table(ledger: Ledger, group: str) -> Table:
+    table = Table(title=f"Model spend by {group}")
+    table.add_column(group.title())
+    for column in ["Calls", "Cache hits", "Errors", "Cost"]:
+        table.add_column(column, justify="right")
+    for name, calls, hits, errors, cost in ledger.totals(group):
+        table.add_row(
+            name,
+            str(calls),
+            f"{hits} ({hits / calls:.0%})",
+            str(errors) if errors else "",
+            f"${cost:.4f}",
+        )
+    return table
+
+
+def _publish_table(ledger: Ledger) -> Table:
+    table = Table(title="Publishes by platform")
+    table.add_column("Platform")
+    for column in ["Posts", "Errors"]:
+        table.add_column(column, justify="right")
+    for name, calls, _, errors, _ in ledger.totals("model", PUBLISH):
+        table.add_row(name, str(calls), f"[red]{errors}[/]" if errors else "0")
+    return table
+
+
+@app.command()
+def stats(
+    days: Annotated[
+        int, typer.Option(min=1, help="How many days of calls the latencies cover.")
+    ] = 30,
+    keep_days: Annotated[
+        int,
+        typer.Option(
+            min=1,
+            help="Fold calls older than this into monthly totals to keep the ledger small.",
+        ),
+    ] = DEFAULT_KEEP_DAYS,
+):
+    """
+    Show latency, spend and cache hit rates from the ledger of model calls and publishes.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    ledger = Ledger(CACHE_DIR)
+    try:
+        compacted = ledger.compact(keep_days)
+        since = time.time() - days * 24 * 60 * 60
+
+        print(_latency_table(ledger, since, days))
+        for group in ["command", "model", "month"]:
+            print(_spend_table(ledger, group))
+
+        print(_publish_table(ledger))
+
+        totals = ledger.totals("model")
+        calls = sum(row[1] for row in totals)
+        hits = sum(row[2] for row in totals)
+
+        style = "sky_blue1"
+        if calls:
+            print(f"[{style}]Cache hit rate:[/] {hits / calls:.0%} of {calls} model calls")
+        print(f"[{style}]Ledger:[/] {ledger.path} ({format_bytes(ledger.path.stat().st_size)})")
+        if compacted:
+            print(f"[{style}]Compacted:[/] {compacted} calls older than {keep_days} days")
+    finally:
+        ledger.close()
@@ -1,13 +1,31 @@
 from .annotations import Annotations
 from .helpers import Helpers
+from .lazy_group import lazy_group
+from pathlib import Path
 
 APP_NAME = "sak"
 
+CACHE_DIR = Path.home() / ".cache" / APP_NAME
+
 DEFAULT_AI_MODEL = "gpt-4o-mini"
 
+DEFAULT_IMAGE_CONCURRENCY = 4
+
+DEFAULT_PUBLISH_CONCURRENCY = 4
+
+DEFAULT_MAX_INPUT_TOKENS = 30_000
+
+DEFAULT_AI_CONCURRENCY = 4
+
 __all__ = [
     "APP_NAME",
+    "CACHE_DIR",
+    "DEFAULT_AI_CONCURRENCY",
     "DEFAULT_AI_MODEL",
+    "DEFAULT_IMAGE_CONCURRENCY",
+    "DEFAULT_MAX_INPUT_TOKENS",
+    "DEFAULT_PUBLISH_CONCURRENCY",
     "Annotations",
     "Helpers",
+    "lazy_group",
 ]
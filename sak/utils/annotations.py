@@ -7,3 +7,17 @@ class Annotations:
     filepath = Annotated[Path, typer.Argument(help="The filepath of the blog post.")]
 
     model = Annotated[str, typer.Option(help="The model you wish to use.")]
+
+    no_cache = Annotated[
+        bool, typer.Option("--no-cache", help="Don't read or write the response cache.")
+    ]
+
+    refresh = Annotated[
+        bool,
+        typer.Option("--refresh", help="Ask the model again and replace the cached response."),
+    ]
+
+    max_input_tokens = Annotated[
+        int,
+        typer.Option(help="Cut the article short if it is estimated to be longer than this."),
+    ]
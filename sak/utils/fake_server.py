@@ -0,0 +1,413 @@
+"""
+A local stand-in for the Medium, Dev.to and OpenAI APIs, for load tests and trying
+commands out without touching the real services.
+
+It answers every request with a plausible response after an injectable delay, and can
+be told to rate limit or fail a share of requests. OpenAI's files and batches endpoints
+are there too, with a batch that takes a few polls to complete. Faults come from a seeded random
+generator, so the same settings give the same run.
+"""
+
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple, Optional
+
+
+class Faults(NamedTuple):
+    # seconds added to every response, give or take up to `jitter`
+    latency: float = 0.0
+    jitter: float = 0.0
+    # share of requests answered with a 429, and with a 500
+    rate_limited: float = 0.0
+    failures: float = 0.0
+    retry_after: float = 0.1
+    seed: int = 0
+
+
+# the text every generated string field gets, short enough to pass as a title
+SAMPLE_TEXT = "Generated by the sak stand-in server"
+
+ROUTES = [
+    ("me", "GET", re.compile(r"^/v1/me$")),
+    ("images", "POST", re.compile(r"^/v1/images$")),
+    ("posts", "POST", re.compile(r"^/v1/users/(?P<user>[^/]+)/posts$")),
+    ("articles", "POST", re.compile(r"^/api/articles$")),
+    ("chat", "POST", re.compile(r"^/v1/chat/completions$")),
+    ("files", "POST", re.compile(r"^/v1/files$")),
+    ("file content", "GET", re.compile(r"^/v1/files/(?P<file>[^/]+)/content$")),
+    ("batches", "POST", re.compile(r"^/v1/batches$")),
+    ("batch", "GET", re.compile(r"^/v1/batches/(?P<batch>[^/]+)$")),
+    ("static", "GET", re.compile(r"^/static/.+\.png$")),
+]
+
+
+def example(schema: dict, defs: Optional[dict] = None) -> object:
+    """Build a value that fits a JSON schema, enough for structured outputs to parse."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example(defs[schema["$ref"].split("/")[-1]], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return example(schema["anyOf"][0], defs)
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: example(field, defs)
+            for name, field in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [example(schema.get("items", {}), defs) for _ in range(3)]
+    if kind == "integer":
+        return max(schema.get("minimum", 3), min(schema.get("maximum", 3), 3))
+    if kind == "number":
+        return 3.0
+    if kind == "boolean":
+        return True
+    return SAMPLE_TEXT
+
+
+def _png(size: int) -> bytes:
+    from PIL import Image
+
+    # noise so the image doesn't compress away, and converting it takes real work
+    image = Image.effect_noise((size, size), 64).convert("RGB")
+    data = io.BytesIO()
+    image.save(data, "PNG")
+    return data.getvalue()
+
+
+def _read_upload(body: bytes, content_type: str) -> dict[str, bytes]:
+    # the fields of a multipart/form-data upload, by name
+    from email.parser import BytesParser
+    from email.policy import HTTP
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+
+
+class FakeServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        faults: Faults = Faults(),
+        image_size: int = 256,
+        batch_polls: int = 1,
+    ):
+        self.faults = faults
+        self.image = _png(image_size)
+        # how many times a batch is reported in progress before it completes
+        self.batch_polls = batch_polls
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        # (route, status) -> count
+        self.requests: Counter[tuple[str, int]] = Counter()
+        self.received_bytes = 0
+        self._random = random.Random(faults.seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict[str, str]:
+        """Environment variables that point sak at this server."""
+        return {
+            "MEDIUM_API_URL": f"{self.base_url}/v1",
+            "DEV_API_URL": f"{self.base_url}/api/articles",
+            "OPENAI_BASE_URL": f"{self.base_url}/v1",
+            "MEDIUM_API_KEY": "stand-in",
+            "DEV_API_KEY": "stand-in",
+            "OPENAI_API_KEY": "stand-in",
+        }
+
+    def image_url(self, name: str) -> str:
+        return f"{self.base_url}/static/{name}.png"
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _fault(self) -> tuple[float, Optional[int]]:
+        # drawn under the lock so a seed always gives the same sequence of faults
+        with self._lock:
+            delay = self.faults.latency + self._random.uniform(
+                -self.faults.jitter, self.faults.jitter
+            )
+            roll = self._random.random()
+        if roll < self.faults.rate_limited:
+            return max(0.0, delay), 429
+        if roll < self.faults.rate_limited + self.faults.failures:
+            return max(0.0, delay), 500
+        return max(0.0, delay), None
+
+    def _record(self, route: str, status: int, received: int):
+        with self._lock:
+            self.requests[route, status] += 1
+            self.received_bytes += received
+
+    def _respond(self, route: str, match: re.Match, request: dict) -> tuple[int, dict | bytes]:
+        if route == "me":
+            return 200, {"data": {"id": "stand-in-user", "username": "stand-in"}}
+        if route == "images":
+            name = uuid.uuid4().hex
+            return 201, {"data": {"url": f"{self.base_url}/static/uploaded/{name}.png"}}
+        if route == "posts":
+            post_id = uuid.uuid4().hex[:12]
+            return 201, {
+                "data": {
+                    "id": post_id,
+                    "authorId": match["user"],
+                    "url": f"{self.base_url}/posts/{post_id}",
+                    "publishStatus": "draft",
+                }
+            }
+        if route == "articles":
+            article_id = uuid.uuid4().int % 10**6
+            return 201, {"id": article_id, "url": f"{self.base_url}/articles/{article_id}"}
+        if route == "static":
+            return 200, self.image
+        if route == "files":
+            return 200, self._upload(request)
+        if route == "file content":
+            if match["file"] not in self.files:
+                return 404, {"error": {"message": f"No such file: {match['file']}"}}
+            return 200, self.files[match["file"]]
+        if route == "batches":
+            return 200, self._create_batch(request)
+        if route == "batch":
+            if match["batch"] not in self.batches:
+                return 404, {"error": {"message": f"No such batch: {match['batch']}"}}
+            return 200, self._poll_batch(match["batch"])
+        return 200, self._completion(request)
+
+    def _upload(self, fields: dict[str, bytes]) -> dict:
+        file_id = f"file-{uuid.uuid4().hex}"
+        with self._lock:
+            self.files[file_id] = fields["file"]
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(fields["file"]),
+            "created_at": int(time.time()),
+            "filename": "upload.jsonl",
+            "purpose": fields.get("purpose", b"").decode(),
+            "status": "processed",
+        }
+
+    def _create_batch(self, request: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"],
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "polls": 0,
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+        return {key: value for key, value in batch.items() if key != "polls"}
+
+    def _poll_batch(self, batch_id: str) -> dict:
+        with self._lock:
+            batch = self.batches[batch_id]
+            batch["polls"] += 1
+            if batch["status"] != "completed" and batch["polls"] > self.batch_polls:
+                self._complete_batch(batch)
+            elif batch["status"] == "validating":
+                batch["status"] = "in_progress"
+        return {key: value for key, value in batch.items() if key != "polls"}
+
+    def _complete_batch(self, batch: dict):
+        # every request in the input file answered as the chat endpoint would
+        lines = []
+        for line in self.files[batch["input_file_id"]].decode().splitlines():
+            request = json.loads(line)
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "request_id": uuid.uuid4().hex,
+                            "body": self._completion(request["body"]),
+                        },
+                        "error": None,
+                    }
+                )
+            )
+        output_id = f"file-{uuid.uuid4().hex}"
+        self.files[output_id] = "\n".join(lines).encode()
+        batch.update(
+            status="completed",
+            completed_at=int(time.time()),
+            output_file_id=output_id,
+            request_counts={"total": len(lines), "completed": len(lines), "failed": 0},
+        )
+
+    def _completion(self, request: dict) -> dict:
+        response_format = request.get("response_format") or {}
+        schema = response_format.get("json_schema", {}).get("schema")
+        content = json.dumps(example(schema)) if schema else SAMPLE_TEXT
+        prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content, "refusal": None},
+                    "finish_reason": "stop",
+                    "logprobs": None,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        }
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(
+                self,
+                status: int,
+                payload: dict | bytes,
+                headers: Optional[dict] = None,
+                content_type: str = "image/png",
+            ):
+                if isinstance(payload, bytes):
+                    body = payload
+                else:
+                    body, content_type = json.dumps(payload).encode(), "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, completion: dict, include_usage: bool):
+                # the whole answer in one chunk is enough for the client to parse it
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunk = {
+                    "id": completion["id"],
+                    "object": "chat.completion.chunk",
+                    "created": completion["created"],
+                    "model": completion["model"],
+                }
+                message = completion["choices"][0]["message"]
+                delta = {"role": "assistant", "content": message["content"]}
+                events = [
+                    {**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+                    {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+                ]
+                if include_usage:
+                    events.append({**chunk, "choices": [], "usage": completion["usage"]})
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def _handle(self, method: str):
+                path = self.path.split("?", 1)[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                for route, route_method, pattern in ROUTES:
+                    match = pattern.match(path)
+                    if match and method == route_method:
+                        break
+                else:
+                    server._record("unknown", 404, len(body))
+                    self._send(404, {"errors": [{"message": f"No route for {method} {path}"}]})
+                    return
+
+                delay, status = server._fault()
+                time.sleep(delay)
+                if status == 429:
+                    server._record(route, status, len(body))
+                    headers = {"Retry-After": f"{server.faults.retry_after:g}"}
+                    self._send(status, {"errors": [{"message": "Too many requests"}]}, headers)
+                    return
+                if status == 500:
+                    server._record(route, status, len(body))
+                    self._send(status, {"errors": [{"message": "Injected failure"}]})
+                    return
+
+                if route == "files":
+                    request = _read_upload(body, self.headers.get("Content-Type", ""))
+                else:
+                    request = json.loads(body) if route in ("chat", "batches") and body else {}
+                status, payload = server._respond(route, match, request)
+                server._record(route, status, len(body))
+                if route == "chat" and request.get("stream"):
+                    options = request.get("stream_options") or {}
+                    self._stream(payload, options.get("include_usage", False))
+                elif route == "file content":
+                    self._send(status, payload, content_type="application/octet-stream")
+                else:
+                    self._send(status, payload)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
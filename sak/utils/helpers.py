@@ -1,16 +1,24 @@
+import glob
+import time
 import typer
 from rich import print
 from pathlib import Path
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from pydantic import BaseModel
-from openai import OpenAI
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional
+from . import ledger, trace
 
-class ModelCost(BaseModel):
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from pydantic import BaseModel
+
+
+# NamedTuples rather than pydantic models so importing sak.utils stays cheap
+class ModelCost(NamedTuple):
     cost: float
     per_amount: int
 
 
-class GptModel(BaseModel):
+class GptModel(NamedTuple):
     input: ModelCost
     output: ModelCost
     cached: ModelCost
@@ -30,10 +38,51 @@ MODELS = {
 }
 
 
+class Usage(NamedTuple):
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    # the part of the prompt the provider had already seen
+    cached_tokens: int
+    # hit, miss, refreshed or off for the local response cache
+    cache: str
+    model_version: Optional[str] = None
+
+
 def calc_cost(tokens: int, cost: float, per_amount: int):
     return tokens / per_amount * cost
 
 
+def usage_cost(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> float:
+    # cached_tokens are the part of the prompt the provider had already seen
+    model_pricing = MODELS[model]
+    prompt_cost = calc_cost(
+        prompt_tokens - cached_tokens,
+        model_pricing.input.cost,
+        model_pricing.input.per_amount,
+    ) + calc_cost(
+        cached_tokens,
+        model_pricing.cached.cost,
+        model_pricing.cached.per_amount,
+    )
+    completion_cost = calc_cost(
+        completion_tokens,
+        model_pricing.output.cost,
+        model_pricing.output.per_amount,
+    )
+    return prompt_cost + completion_cost
+
+
+def format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
 class Helpers:
     @staticmethod
     def validate_model(model: str):
@@ -47,6 +96,26 @@ class Helpers:
             print(f"[bold red]File not found:[/bold red] {filepath}")
             raise typer.Exit(code=1)
 
+    @staticmethod
+    def find_posts(pattern: str) -> list[Path]:
+        # a single post, every post under a directory, or a glob pattern
+        path = Path(pattern)
+        if path.is_file():
+            return [path]
+
+        if path.is_dir():
+            posts = sorted(path.rglob("*.md"))
+        else:
+            posts = sorted(
+                Path(match) for match in glob.glob(pattern, recursive=True)
+            )
+            posts = [post for post in posts if post.is_file()]
+
+        if not posts:
+            print(f"[bold red]No blog posts found:[/bold red] {pattern}")
+            raise typer.Exit(code=1)
+        return posts
+
     @staticmethod
     def get_spinner(msg: str) -> Progress:
         return Progress(
@@ -63,47 +132,351 @@ class Helpers:
             raise typer.Exit()
 
     @staticmethod
-    def query_gpt(model: str, messages: list, response_format: BaseModel):
+    def print_usage(
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache: str,
+        model_version: Optional[str] = None,
+        cached_tokens: int = 0,
+    ):
+        total_cost = usage_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        cached_ratio = cached_tokens / prompt_tokens if prompt_tokens else 0
+
+        style = "yellow"
+        print(f"[{style}]-----------Usage Stats-----------[/]")
+        print(f"[{style}]Model: [/] {model_version or model}")
+        print(f"[{style}]Prompt Tokens:[/] {prompt_tokens}")
+        print(f"[{style}]Cached Prompt Tokens:[/] {cached_tokens} ({cached_ratio:.0%})")
+        print(f"[{style}]Completion Tokens:[/] {completion_tokens}")
+        print(f"[{style}]Total Tokens: [/] {prompt_tokens + completion_tokens}")
+        if cache == "hit":
+            print(f"[{style}]Total Cost: [/] $0 (saved ${total_cost})")
+        else:
+            print(f"[{style}]Total Cost: [/] ${total_cost}")
+        print(f"[{style}]Cache: [/] {cache}")
+        print(f"[{style}]---------------------------------[/]")
+
+    @staticmethod
+    def show_usage(usage: Usage):
+        Helpers.print_usage(
+            usage.model,
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            usage.cache,
+            model_version=usage.model_version,
+            cached_tokens=usage.cached_tokens,
+        )
+
+    @staticmethod
+    def combine_usage(usages: list[Usage]) -> Usage:
+        # totals of what was actually spent, unless every query was a local cache hit
+        hits = [usage for usage in usages if usage.cache == "hit"]
+        spent = [usage for usage in usages if usage.cache != "hit"] or hits
+        if len(hits) == len(usages):
+            cache = "hit"
+        else:
+            cache = f"{len(hits)} of {len(usages)} hit"
+        return Usage(
+            spent[0].model,
+            sum(usage.prompt_tokens for usage in spent),
+            sum(usage.completion_tokens for usage in spent),
+            sum(usage.cached_tokens for usage in spent),
+            cache,
+            model_version=spent[0].model_version,
+        )
+
+    @staticmethod
+    def _cached_response(
+        model: str,
+        messages: list,
+        response_format: "type[BaseModel]",
+        use_cache: bool,
+        refresh: bool,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+    ) -> tuple[Optional[str], Optional["BaseModel"]]:
+        # returns the cache key (None when caching is off) and the cached response, if any
+        from . import CACHE_DIR
+        from .llm_cache import LLMCache
+
+        if not use_cache:
+            return None, None
+
+        cache_key = LLMCache.key(model, messages, response_format.model_json_schema())
+        if refresh:
+            return cache_key, None
+
+        start = time.perf_counter()
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        llm_cache = LLMCache(CACHE_DIR)
+        cached = llm_cache.get(cache_key)
+        llm_cache.close()
+        if cached is None:
+            return cache_key, None
+
+        usage = Usage(
+            model,
+            cached.prompt_tokens,
+            cached.completion_tokens,
+            cached.cached_tokens,
+            "hit",
+        )
+        (on_usage or Helpers.show_usage)(usage)
+        Helpers.record_usage(usage, time.perf_counter() - start)
+        return cache_key, response_format.model_validate_json(cached.response)
+
+    @staticmethod
+    def record_usage(usage: Usage, latency: float):
+        # a local cache hit didn't cost anything
+        cost = 0.0
+        if usage.cache != "hit":
+            cost = usage_cost(
+                usage.model,
+                usage.prompt_tokens,
+                usage.completion_tokens,
+                usage.cached_tokens,
+            )
+        ledger.record(
+            ledger.LLM,
+            usage.model,
+            latency,
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            usage.cached_tokens,
+            cost,
+            usage.cache,
+        )
+
+    @staticmethod
+    def record_failure(model: str, error: Exception, start: Optional[float]):
+        # failed calls cost nothing but still belong in the ledger's error counts
+        latency = 0.0 if start is None else time.perf_counter() - start
+        ledger.record(ledger.LLM, model, latency, error=f"{type(error).__name__}: {error}")
+
+    @staticmethod
+    def _trace_usage(span: trace.Span, completion):
+        if completion.usage is not None:
+            span.set(
+                prompt_tokens=completion.usage.prompt_tokens,
+                completion_tokens=completion.usage.completion_tokens,
+            )
+
+    @staticmethod
+    def _parse_completion(
+        model: str,
+        completion,
+        cache_key: Optional[str],
+        refresh: bool,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        latency: float = 0.0,
+    ) -> "BaseModel":
+        from . import CACHE_DIR
+        from .llm_cache import LLMCache
+
+        message = completion.choices[0].message
+        usage = completion.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (details.cached_tokens or 0) if details else 0
+
+        if cache_key is None:
+            cache_status = "off"
+        else:
+            cache_status = "refreshed" if refresh else "miss"
+        spent = Usage(
+            model,
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            cached_tokens,
+            cache_status,
+            model_version=completion.model,
+        )
+        (on_usage or Helpers.show_usage)(spent)
+        Helpers.record_usage(spent, latency)
+
+        if message.parsed:
+            if cache_key is not None:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                llm_cache = LLMCache(CACHE_DIR)
+                llm_cache.put(
+                    cache_key,
+                    model,
+                    message.parsed.model_dump_json(),
+                    usage.prompt_tokens,
+                    usage.completion_tokens,
+                    cached_tokens,
+                )
+                llm_cache.prune()
+                llm_cache.close()
+            return message.parsed
+        elif message.refusal:
+            print(message.refusal)
+            raise typer.Exit(code=1)
+
+    @staticmethod
+    def query_gpt(
+        model: str,
+        messages: list,
+        response_format: "type[BaseModel]",
+        use_cache: bool = True,
+        refresh: bool = False,
+    ):
+        """
+        Ask the model for a `response_format` object. Responses are cached on disk unless
+        `use_cache` is off; `refresh` skips the lookup but still stores the new response.
+        """
+        from openai import OpenAI
+
+        start = None
         try:
+            cache_key, cached = Helpers._cached_response(
+                model, messages, response_format, use_cache, refresh
+            )
+            if cached is not None:
+                return cached
+
             client = OpenAI()
-            completion = client.beta.chat.completions.parse(
-                model=model,
-                messages=messages,
-                response_format=response_format,
+            start = time.perf_counter()
+            with trace.span("query_gpt", model=model) as span:
+                completion = client.beta.chat.completions.parse(
+                    model=model,
+                    messages=messages,
+                    response_format=response_format,
+                )
+                Helpers._trace_usage(span, completion)
+            return Helpers._parse_completion(
+                model,
+                completion,
+                cache_key,
+                refresh,
+                latency=time.perf_counter() - start,
             )
-            message = completion.choices[0].message
+        except typer.Exit:
+            raise
+        except Exception as e:
+            Helpers.record_failure(model, e, start)
+            print(e)
+            raise typer.Exit(code=1)
 
-            model_pricing = MODELS[model]
+    @staticmethod
+    def query_gpt_stream(
+        model: str,
+        messages: list,
+        response_format: "type[BaseModel]",
+        on_field: Callable[[str, object], None],
+        use_cache: bool = True,
+        refresh: bool = False,
+    ):
+        """
+        `query_gpt` that streams the response and calls `on_field(name, value)` for each
+        top level field of `response_format` as soon as the model has finished writing it.
+        Returns the same parsed object as `query_gpt`.
+        """
+        from openai import OpenAI
+        from pydantic import TypeAdapter
 
-            style = "yellow"
-            print(f"[{style}]-----------Usage Stats-----------[/]")
-            print(f"[{style}]Model: [/] {completion.model}")
+        fields = list(response_format.model_fields.items())
 
-            prompt_cost = calc_cost(
-                completion.usage.prompt_tokens,
-                model_pricing.input.cost,
-                model_pricing.input.per_amount,
-            )
-            print(f"[{style}]Prompt Tokens:[/] {completion.usage.prompt_tokens}")
+        def emit(index: int, value):
+            name, info = fields[index]
+            on_field(name, TypeAdapter(info.annotation).validate_python(value))
 
-            completion_cost = calc_cost(
-                completion.usage.completion_tokens,
-                model_pricing.output.cost,
-                model_pricing.output.per_amount,
+        start = None
+        try:
+            cache_key, cached = Helpers._cached_response(
+                model, messages, response_format, use_cache, refresh
             )
-            print(
-                f"[{style}]Completion Tokens:[/] {completion.usage.completion_tokens}"
+            if cached is not None:
+                for index, (name, _) in enumerate(fields):
+                    emit(index, getattr(cached, name))
+                return cached
+
+            client = OpenAI()
+            done = 0
+            start = time.perf_counter()
+            with (
+                trace.span("query_gpt", model=model) as span,
+                client.beta.chat.completions.stream(
+                    model=model,
+                    messages=messages,
+                    response_format=response_format,
+                    stream_options={"include_usage": True},
+                ) as stream,
+            ):
+                for event in stream:
+                    if event.type != "content.delta" or not event.parsed:
+                        continue
+                    # structured output follows the schema's field order, so a field is
+                    # complete once the model has started on the next one
+                    while done + 1 < len(fields) and fields[done + 1][0] in event.parsed:
+                        emit(done, event.parsed[fields[done][0]])
+                        done += 1
+                completion = stream.get_final_completion()
+                Helpers._trace_usage(span, completion)
+
+            # whatever is left (at least the last field) comes from the final object
+            parsed = completion.choices[0].message.parsed
+            if parsed is not None:
+                for index in range(done, len(fields)):
+                    emit(index, getattr(parsed, fields[index][0]))
+            return Helpers._parse_completion(
+                model,
+                completion,
+                cache_key,
+                refresh,
+                latency=time.perf_counter() - start,
             )
+        except typer.Exit:
+            raise
+        except Exception as e:
+            Helpers.record_failure(model, e, start)
+            print(e)
+            raise typer.Exit(code=1)
 
-            print(f"[{style}]Total Tokens: [/] {completion.usage.total_tokens}")
-            print(f"[{style}]Total Cost: [/] ${prompt_cost + completion_cost}")
-            print(f"[{style}]---------------------------------[/]")
+    @staticmethod
+    async def query_gpt_async(
+        client: "AsyncOpenAI",
+        model: str,
+        messages: list,
+        response_format: "type[BaseModel]",
+        use_cache: bool = True,
+        refresh: bool = False,
+        on_usage: Optional[Callable[[Usage], None]] = None,
+        raise_errors: bool = False,
+    ):
+        """
+        `query_gpt` for running several queries at once through one shared client.
+        Pass `on_usage` to collect the usage of each query instead of printing it, and
+        `raise_errors` to handle a failed query yourself rather than print it and exit.
+        """
+        start = None
+        try:
+            cache_key, cached = Helpers._cached_response(
+                model, messages, response_format, use_cache, refresh, on_usage
+            )
+            if cached is not None:
+                return cached
 
-            if message.parsed:
-                return message.parsed
-            elif message.refusal:
-                print(message.refusal)
-                raise typer.Exit(code=1)
+            start = time.perf_counter()
+            with trace.span("query_gpt", model=model) as span:
+                completion = await client.beta.chat.completions.parse(
+                    model=model,
+                    messages=messages,
+                    response_format=response_format,
+                )
+                Helpers._trace_usage(span, completion)
+            return Helpers._parse_completion(
+                model,
+                completion,
+                cache_key,
+                refresh,
+                on_usage,
+                latency=time.perf_counter() - start,
+            )
+        except typer.Exit:
+            raise
         except Exception as e:
+            Helpers.record_failure(model, e, start)
+            if raise_errors:
+                raise
             print(e)
-            raise typer.Exit(code=1)
\ No newline at end of file
+            raise typer.Exit(code=1)
@@ -0,0 +1,48 @@
+import importlib
+import typer
+from typer.core import TyperGroup
+
+
+def _load_command(import_path: str):
+    # import_path is "package.module:attr" where attr is a typer.Typer instance
+    module_name, _, attr = import_path.partition(":")
+    sub_app = getattr(importlib.import_module(module_name), attr)
+
+    if (
+        sub_app.registered_callback
+        or sub_app.registered_groups
+        or len(sub_app.registered_commands) > 1
+    ):
+        return typer.main.get_group(sub_app)
+
+    (command_info,) = sub_app.registered_commands
+    return typer.main.get_command_from_info(
+        command_info,
+        pretty_exceptions_short=sub_app.pretty_exceptions_short,
+        rich_markup_mode=sub_app.rich_markup_mode,
+    )
+
+
+class LazyGroup(TyperGroup):
+    """
+    A TyperGroup whose subcommands are only imported when they are looked up.
+    Keeps `sak version`, `--help` and shell completion from pulling in every command's dependencies.
+    """
+
+    lazy_commands: dict[str, str] = {}
+
+    def list_commands(self, ctx: typer.Context) -> list[str]:
+        commands = super().list_commands(ctx)
+        return commands + [name for name in self.lazy_commands if name not in commands]
+
+    def get_command(self, ctx: typer.Context, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            command = _load_command(self.lazy_commands[cmd_name])
+            command.name = cmd_name
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+def lazy_group(commands: dict[str, str]) -> type[LazyGroup]:
+    """Build a LazyGroup class for `typer.Typer(cls=...)` from a name -> "module:attr" map."""
+    return type("LazyGroup", (LazyGroup,), {"lazy_commands": commands})
@@ -0,0 +1,244 @@
+"""
+An append-only record of every model call and publish, for `sak stats`.
+
+Rows older than a few months are folded into per-month totals, so spend and hit rates
+are kept for good while the ledger itself stays small.
+"""
+
+import contextvars
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+DEFAULT_KEEP_DAYS = 90
+
+# how many rows go in between automatic compactions
+COMPACT_EVERY = 500
+
+LLM = "llm"
+PUBLISH = "publish"
+
+# the command being run, e.g. "blog review", filled in as the command tree is walked
+_command: list[str] = []
+
+# the post a model call is about, set once the post has been read
+current_post: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "sak_post", default=None
+)
+
+
+class Event(NamedTuple):
+    created: float
+    kind: str
+    command: str
+    # the model for a model call, the platform for a publish
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    cost: float
+    latency: float
+    # hit, miss, refreshed or off for model calls
+    cache: Optional[str]
+    post_hash: Optional[str]
+    error: Optional[str]
+
+
+def enter_command(name: Optional[str], root: bool = False):
+    if root:
+        _command.clear()
+    if name:
+        _command.append(name)
+
+
+def command() -> str:
+    return " ".join(_command) or "-"
+
+
+def post_hash(content: str) -> str:
+    import hashlib
+
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def set_post(content: str):
+    current_post.set(post_hash(content))
+
+
+def percentile(values: list[float], q: float) -> float:
+    # nearest rank, good enough for a handful of samples
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Ledger:
+    filename = "ledger.db"
+
+    def __init__(self, cache_dir: Path):
+        # imported here, the command tree loads this module on every run
+        import sqlite3
+
+        self.path = cache_dir / self.filename
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                created REAL NOT NULL,
+                kind TEXT NOT NULL,
+                command TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                cached_tokens INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                latency REAL NOT NULL,
+                cache TEXT,
+                post_hash TEXT,
+                error TEXT
+            )
+            """
+        )
+        # what compaction leaves of older events
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS monthly (
+                month TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                command TEXT NOT NULL,
+                model TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                errors INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                cached_tokens INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                latency REAL NOT NULL,
+                PRIMARY KEY (month, kind, command, model)
+            )
+            """
+        )
+
+    def append(self, event: Event):
+        with self.conn:
+            row_id = self.conn.execute(
+                "INSERT INTO events VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                event,
+            ).lastrowid
+        if row_id % COMPACT_EVERY == 0:
+            self.compact()
+
+    def events(self, since: float = 0) -> list[Event]:
+        rows = self.conn.execute(
+            f"SELECT {', '.join(Event._fields)} FROM events WHERE created >= ? ORDER BY created",
+            (since,),
+        )
+        return [Event(*row) for row in rows]
+
+    def totals(self, group: str, kind: str = LLM) -> list[tuple]:
+        """
+        Calls, cache hits, errors and cost of model calls (or publishes) grouped by
+        "command", "model" or "month", compacted months included.
+        """
+        key = {
+            "command": "command",
+            "model": "model",
+            "month": "strftime('%Y-%m', created, 'unixepoch', 'localtime')",
+        }[group]
+        monthly_key = "month" if group == "month" else group
+        return self.conn.execute(
+            f"""
+            SELECT name, SUM(calls), SUM(hits), SUM(errors), SUM(cost) FROM (
+                SELECT {key} AS name, COUNT(*) AS calls,
+                    COALESCE(SUM(cache = 'hit'), 0) AS hits, SUM(error IS NOT NULL) AS errors,
+                    SUM(cost) AS cost
+                FROM events WHERE kind = ? GROUP BY name
+                UNION ALL
+                SELECT {monthly_key}, SUM(calls), SUM(hits), SUM(errors), SUM(cost)
+                FROM monthly WHERE kind = ? GROUP BY {monthly_key}
+            )
+            GROUP BY name ORDER BY name
+            """,
+            (kind, kind),
+        ).fetchall()
+
+    def compact(self, keep_days: float = DEFAULT_KEEP_DAYS) -> int:
+        # fold events older than `keep_days` into their month's totals
+        cutoff = time.time() - keep_days * 24 * 60 * 60
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO monthly
+                SELECT
+                    strftime('%Y-%m', created, 'unixepoch', 'localtime'), kind, command, model,
+                    COUNT(*), COALESCE(SUM(cache = 'hit'), 0), SUM(error IS NOT NULL),
+                    SUM(prompt_tokens), SUM(completion_tokens), SUM(cached_tokens),
+                    SUM(cost), SUM(latency)
+                FROM events WHERE created < ?
+                GROUP BY 1, 2, 3, 4
+                ON CONFLICT (month, kind, command, model) DO UPDATE SET
+                    calls = calls + excluded.calls,
+                    hits = hits + excluded.hits,
+                    errors = errors + excluded.errors,
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    completion_tokens = completion_tokens + excluded.completion_tokens,
+                    cached_tokens = cached_tokens + excluded.cached_tokens,
+                    cost = cost + excluded.cost,
+                    latency = latency + excluded.latency
+                """,
+                (cutoff,),
+            )
+            removed = self.conn.execute(
+                "DELETE FROM events WHERE created < ?", (cutoff,)
+            ).rowcount
+        if removed:
+            self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.conn.close()
+
+
+def record(
+    kind: str,
+    model: str,
+    latency: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    cached_tokens: int = 0,
+    cost: float = 0.0,
+    cache: Optional[str] = None,
+    post: Optional[str] = None,
+    error: Optional[str] = None,
+    cache_dir: Optional[Path] = None,
+):
+    """Add an event to the ledger in `cache_dir`. Never fails the command."""
+    import sqlite3
+    from . import CACHE_DIR
+
+    cache_dir = cache_dir or CACHE_DIR
+
+    event = Event(
+        time.time(),
+        kind,
+        command(),
+        model,
+        prompt_tokens,
+        completion_tokens,
+        cached_tokens,
+        cost,
+        latency,
+        cache,
+        post or current_post.get(),
+        error,
+    )
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        ledger = Ledger(cache_dir)
+        try:
+            ledger.append(event)
+        finally:
+            ledger.close()
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_MAX_ENTRIES = 2_000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+class CachedResponse(NamedTuple):
+    response: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+
+
+class LLMCacheStats(NamedTuple):
+    entries: int
+    response_bytes: int
+    disk_bytes: int
+    oldest: Optional[float]
+    newest: Optional[float]
+
+
+class LLMCache:
+    """
+    Keeps structured responses from the OpenAI API so asking the same question twice is free.
+    Entries are keyed by the model, the messages and the response schema, so changing a
+    prompt or a response model is a miss. Least recently used entries go first.
+    """
+
+    filename = "llm_responses.db"
+
+    def __init__(self, cache_dir: Path):
+        self.path = cache_dir / self.filename
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                cached_tokens INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # caches created before cached prompt tokens were recorded
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(llm_responses)")}
+        if "cached_tokens" not in columns:
+            with self.conn:
+                self.conn.execute(
+                    "ALTER TABLE llm_responses ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0"
+                )
+
+    @staticmethod
+    def key(model: str, messages: list, schema: dict) -> str:
+        schema_hash = hashlib.sha256(
+            json.dumps(schema, sort_keys=True).encode()
+        ).hexdigest()
+        request = json.dumps([model, messages, schema_hash], sort_keys=True)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT response, prompt_tokens, completion_tokens, cached_tokens FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.conn.execute(
+                "UPDATE llm_responses SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return CachedResponse(*row)
+
+    def put(
+        self,
+        key: str,
+        model: str,
+        response: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+    ):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    model,
+                    response,
+                    prompt_tokens,
+                    completion_tokens,
+                    len(response.encode()),
+                    now,
+                    now,
+                    cached_tokens,
+                ),
+            )
+
+    def stats(self) -> LLMCacheStats:
+        entries, response_bytes, oldest, newest = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(last_used), MAX(last_used) FROM llm_responses"
+        ).fetchone()
+        return LLMCacheStats(
+            entries=entries,
+            response_bytes=response_bytes,
+            disk_bytes=self.path.stat().st_size,
+            oldest=oldest,
+            newest=newest,
+        )
+
+    def prune(
+        self,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> int:
+        # drop anything not used recently, then the least recently used beyond either bound
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        with self.conn:
+            removed = self.conn.execute(
+                "DELETE FROM llm_responses WHERE last_used < ?", (cutoff,)
+            ).rowcount
+            removed += self.conn.execute(
+                """
+                DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM (
+                        SELECT
+                            key,
+                            ROW_NUMBER() OVER (ORDER BY last_used DESC) AS position,
+                            SUM(size) OVER (ORDER BY last_used DESC) AS running_size
+                        FROM llm_responses
+                    )
+                    WHERE position > ? OR running_size > ?
+                )
+                """,
+                (max_entries, max_bytes),
+            ).rowcount
+        return removed
+
+    def clear(self) -> int:
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM llm_responses").rowcount
+        self.conn.execute("VACUUM")
+        return removed
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,192 @@
+"""
+Opt-in timing of the stages a command goes through (`sak --profile ...` or SAK_TRACE).
+
+Stages are wrapped in `span(name)`, which nests under whatever span is open in the
+same task or thread. When tracing is off `span` hands back a shared do-nothing object,
+so the instrumentation costs next to nothing.
+"""
+
+import atexit
+import contextvars
+import os
+import threading
+import time
+from typing import Optional
+
+# SAK_TRACE=1 prints the summary, any other value is also a file to write the trace to
+TRACE_ENV = "SAK_TRACE"
+
+
+class Span:
+    __slots__ = ("name", "attrs", "parent", "start", "end", "thread", "_token")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.parent: Optional[Span] = None
+        self.start = self.end = 0.0
+        self.thread = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: int = 1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self._token = _current.set(self)
+        self.thread = _track()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.end = time.perf_counter()
+        _current.reset(self._token)
+        if exc_info[0] is not None:
+            self.attrs["error"] = exc_info[0].__name__
+        _tracer.finish(self)
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+    def add(self, key: str, amount: int = 1):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL = _NullSpan()
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "sak_span", default=None
+)
+
+
+def _track() -> int:
+    # each asyncio task gets its own row in the trace, otherwise its thread does
+    import asyncio
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Tracer:
+    def __init__(self, trace_file: Optional[str]):
+        self.trace_file = trace_file
+        self.spans: list[Span] = []
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def finish(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+    def summary(self):
+        from rich.table import Table
+        from .helpers import format_bytes
+
+        # one row per stage name, in the order the stages first started
+        rows: dict[str, list] = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            row = rows.setdefault(span.name, [0, 0.0, 0.0, 0, 0])
+            elapsed = span.end - span.start
+            row[0] += 1
+            row[1] += elapsed
+            row[2] = max(row[2], elapsed)
+            row[3] += span.attrs.get("bytes", 0)
+            row[4] += span.attrs.get("retries", 0)
+
+        wall = time.perf_counter() - self.started
+        table = Table(title=f"Profile ({wall:.2f}s wall time)")
+        table.add_column("Stage")
+        for column in ["Calls", "Total (s)", "Mean (ms)", "Max (ms)", "Bytes", "Retries"]:
+            table.add_column(column, justify="right")
+        for name, (calls, total, longest, size, retries) in rows.items():
+            table.add_row(
+                name,
+                str(calls),
+                f"{total:.3f}",
+                f"{total / calls * 1000:.1f}",
+                f"{longest * 1000:.1f}",
+                format_bytes(size) if size else "",
+                str(retries) if retries else "",
+            )
+        return table
+
+    def chrome_trace(self) -> dict:
+        """The spans in Chrome's trace event format, for chrome://tracing or Perfetto."""
+        tracks: dict[int, int] = {}
+        events = []
+        for span in self.spans:
+            track = tracks.setdefault(span.thread, len(tracks) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "sak",
+                    "ph": "X",
+                    "ts": (span.start - self.started) * 1_000_000,
+                    "dur": (span.end - span.start) * 1_000_000,
+                    "pid": os.getpid(),
+                    "tid": track,
+                    "args": {
+                        **span.attrs,
+                        "parent": span.parent.name if span.parent else None,
+                    },
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def report(self):
+        import json
+        from rich import print
+
+        print(self.summary())
+        if self.trace_file:
+            with open(self.trace_file, "w") as f:
+                json.dump(self.chrome_trace(), f, default=str)
+            print(f"[yellow]Trace written to[/] {self.trace_file}")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable(trace_file: Optional[str] = None):
+    """Start recording spans, and print (and optionally save) them when sak exits."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(trace_file)
+        atexit.register(_tracer.report)
+    elif trace_file:
+        _tracer.trace_file = trace_file
+
+
+def enable_from_env():
+    value = os.getenv(TRACE_ENV, "")
+    if value and value.lower() not in ("0", "false", "no"):
+        enable(None if value.lower() in ("1", "true", "yes") else value)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **attrs) -> Span | _NullSpan:
+    if _tracer is None:
+        return _NULL
+    return Span(name, attrs)
+
+
+def current() -> Span | _NullSpan:
+    """The innermost open span, e.g. to count a retry against it."""
+    if _tracer is None:
+        return _NULL
+    return _current.get() or _NULL
@@ -0,0 +1,183 @@
+import asyncio
+import email.utils
+import importlib.util
+import os
+import random
+import time
+import httpx
+from typing import NamedTuple, Optional
+from . import trace
+
+
+class RateLimit(NamedTuple):
+    per_second: float
+    burst: int
+
+
+# each platform's API, and the variable that points it at another server such as
+# `sak loadtest serve`
+PLATFORM_APIS = {
+    "Medium": ("MEDIUM_API_URL", "https://api.medium.com/v1"),
+    "Dev.to": ("DEV_API_URL", "https://dev.to/api/articles"),
+}
+
+# requests we make to the same platform in one run share these budgets
+DEFAULT_RATE_LIMITS = {
+    "Medium": RateLimit(per_second=5, burst=10),
+    "Dev.to": RateLimit(per_second=1, burst=3),
+}
+
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# worth another go, the server is busy or briefly unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def api_url(platform: str) -> str:
+    variable, default = PLATFORM_APIS[platform]
+    return os.getenv(variable, default)
+
+
+class TokenBucket:
+    def __init__(self, limit: RateLimit):
+        self.rate = limit.per_second
+        self.capacity = limit.burst
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    # Retry-After is either a number of seconds or an HTTP date
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Transport:
+    """
+    One pooled HTTP client for a whole run: keep-alive connections, HTTP/2 when `h2`
+    is installed, explicit timeouts, jittered exponential retries that respect
+    Retry-After, and a token bucket per platform, wherever its API is configured to be.
+
+    Only requests that are safe to repeat are retried on a server error. Anything else
+    (e.g. creating a post) is only retried on 429 or when the connection was never made.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        rate_limits: Optional[dict[str, RateLimit]] = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        # resolved once, so a platform pointed at another server is limited all the same
+        self.apis = {platform: api_url(platform) for platform in self.rate_limits}
+        self.buckets: dict[str, TokenBucket] = {}
+        self.client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    async def __aenter__(self) -> "Transport":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    def _delay(self, attempt: int) -> float:
+        # "full jitter" so concurrent retries don't hit the server in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    async def _throttle(self, url: httpx.URL):
+        platform = next(
+            (platform for platform, api in self.apis.items() if str(url).startswith(api)),
+            None,
+        )
+        if platform is None:
+            return
+        if platform not in self.buckets:
+            self.buckets[platform] = TokenBucket(self.rate_limits[platform])
+        await self.buckets[platform].acquire()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        method = method.upper()
+        request_url = httpx.URL(url)
+
+        with trace.span(f"{method} {request_url.host}") as span:
+            response = await self._request(method, request_url, **kwargs)
+            span.set(status=response.status_code)
+            # sent and received
+            span.add("bytes", int(response.request.headers.get("Content-Length", 0)))
+            span.add("bytes", len(response.content))
+            return response
+
+    async def _request(
+        self, method: str, request_url: httpx.URL, **kwargs
+    ) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                trace.current().add("retries")
+            await self._throttle(request_url)
+            last_attempt = attempt == self.retries
+
+            try:
+                response = await self.client.request(method, request_url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # the request never reached the server, so it is always safe to repeat
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            except httpx.TransportError:
+                if last_attempt or method not in IDEMPOTENT_METHODS:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            retryable = response.status_code == 429 or (
+                response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS
+            )
+            if not retryable or last_attempt:
+                return response
+
+            delay = _retry_after(response)
+            await asyncio.sleep(
+                self._delay(attempt) if delay is None else min(delay, self.max_backoff)
+            )
+
+        raise AssertionError("unreachable")
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
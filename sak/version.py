@@ -1,18 +1,22 @@
 import typer
 from rich import print
-from importlib.metadata import version
 from .utils import APP_NAME
 
 
 app = typer.Typer()
 
-try:
-    __VERSION__ = version(APP_NAME)
-except Exception:
-    __VERSION__ = "unknown"
+
+def get_version() -> str:
+    # importlib.metadata is slow to import, so only look the version up when asked
+    from importlib.metadata import version
+
+    try:
+        return version(APP_NAME)
+    except Exception:
+        return "unknown"
 
 
 @app.command()
 def version():
-    print(f"{APP_NAME} version [bold yellow]{__VERSION__}[/bold yellow]")
+    print(f"{APP_NAME} version [bold yellow]{get_version()}[/bold yellow]")
     typer.Exit()